@@ -0,0 +1,363 @@
+"""
+Benchmarks the fixed update hot path and each render pass over scripted
+scenarios. Prints per call timings as JSON so runs can be compared build
+over build.
+
+    python benchmark.py [--iterations N] [--seed N] [--output PATH] [scenario ...]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable
+
+# Render into an offscreen window, no sound card needed
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+import core.constants as c  # noqa: E402
+import core.globals as g  # noqa: E402
+
+# Scene manager has to be imported before any scene
+from core.setup import setup, setup_grid  # noqa: E402
+from core.replay import rng_seed  # noqa: E402
+
+import components.enemy as e  # noqa: E402
+import components.particles as particles  # noqa: E402
+import components.pathing as path  # noqa: E402
+import components.player as p  # noqa: E402
+from components.batch import batch_flush  # noqa: E402
+from components.camera import camera_pan, camera_visible_tiles  # noqa: E402
+from components.hud import hud_render  # noqa: E402
+from components.particles import (  # noqa: E402
+    MAX_PARTICLES,
+    ParticleSpriteType,
+    particle_burst,
+    particles_clear,
+    particles_render,
+    particles_update,
+)
+from components.tower import (  # noqa: E402
+    TowerType,
+    tower_render,
+    tower_splash_resolve,
+    tower_update,
+)
+from components.wave import wave_data, wave_reset, wave_update  # noqa: E402
+from components.wire import wire_render_tiles  # noqa: E402
+from scenes.game import (  # noqa: E402
+    Game,
+    TutorialState,
+    game_build_core,
+    game_build_tower,
+    game_render_terrain,
+)
+
+
+Samples = dict[str, list[int]]
+
+# Untimed ticks before measuring so the enemy pool and particles fill up
+WARMUP_TICKS = 300
+
+# Map size for the large scenario, and how often its full grid passes are timed
+LARGE_GRID = (256, 256)
+LARGE_PATHING_EVERY = 10
+
+
+def timed(samples: Samples, name: str, fn: Callable, *args) -> None:
+    start = time.perf_counter_ns()
+    fn(*args)
+    samples.setdefault(name, []).append(time.perf_counter_ns() - start)
+
+
+def summarise(samples: list[int]) -> dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "calls": len(ordered),
+        "mean_us": statistics.fmean(ordered) / 1000,
+        "median_us": statistics.median(ordered) / 1000,
+        "p95_us": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] / 1000,
+        "min_us": ordered[0] / 1000,
+        "max_us": ordered[-1] / 1000,
+    }
+
+
+# PASSES
+def pass_towers(game: Game) -> None:
+    for tower in game.towers:
+        tower_update(tower)
+    tower_splash_resolve()
+
+
+# Render passes flush their own queue so each timing covers the drawing too
+# Wires live in the terrain cache, this is what a redraw of them costs
+def render_wires() -> None:
+    wire_render_tiles(g.window, *camera_visible_tiles(g.camera))
+
+
+def render_towers(game: Game) -> None:
+    for tower in game.towers:
+        tower_render(tower)
+    batch_flush()
+
+
+def render_enemies() -> None:
+    for i in range(e.active_enemies):
+        e.enemy_render(i)
+    batch_flush()
+
+
+# SCENARIOS
+def scenario_game() -> Game:
+    game = Game(g.scene_manager)
+    game.enter()
+    game.tutorial = TutorialState.COMPLETE
+    particles_clear()
+
+    # Waves never finish or spawn on their own, scenarios top up enemies instead
+    p.player.health = 10**9
+    e.enemy_health_multiplier = 50
+    wave_data.spawn_remaining = 10**9
+    wave_data.spawn_tick = float("inf")
+    wave_data.spawn_done = False
+
+    return game
+
+
+def scenario_spawn(count: int) -> None:
+    """
+    Spawns up to count enemies without going over the starting pool size
+    """
+    for _ in range(min(count, e.ENEMY_POOL_SIZE - e.active_enemies)):
+        e.enemy_spawn(e.EnemyType.GROUND)
+
+
+def scenario_tick(game: Game, samples: Samples | None) -> None:
+    if samples is None:
+        wave_update()
+        pass_towers(game)
+        particles_update()
+        return
+
+    timed(samples, "wave_update", wave_update)
+    timed(samples, "tower_update", pass_towers, game)
+    timed(samples, "particles_update", particles_update)
+
+
+def scenario_render(game: Game, samples: Samples) -> None:
+    g.window.fill(c.BLACK)
+    timed(samples, "render_terrain", game_render_terrain)
+    timed(samples, "render_wires", render_wires)
+    timed(samples, "render_towers", render_towers, game)
+    timed(samples, "render_enemies", render_enemies)
+    timed(samples, "render_particles", particles_render)
+    timed(samples, "render_hud", hud_render)
+
+
+def scenario_maze(iterations: int) -> tuple[Game, Samples]:
+    """
+    Full enemy pool walking a serpentine maze of towers
+    """
+    game = scenario_game()
+
+    types = (TowerType.NORMAL, TowerType.NORMAL, TowerType.SLOW, TowerType.ZAP)
+    for i, x in enumerate(range(2, c.GRID_WIDTH_TILES - 1, 2)):
+        # alternate the gap between bottom and top
+        if i % 2 == 0:
+            wire, side = game_build_core(game, (x, 0)), c.DOWN
+        else:
+            wire, side = game_build_core(game, (x, c.GRID_HEIGHT_TILES - 1)), c.UP
+        for j in range(c.GRID_HEIGHT_TILES - 2):
+            wire = game_build_tower(game, types[j % len(types)], wire, side)
+            wire.tower.level = j % 3
+
+    samples: Samples = {}
+    for tick in range(WARMUP_TICKS + iterations):
+        scenario_spawn(1)
+        if tick < WARMUP_TICKS:
+            scenario_tick(game, None)
+            continue
+        scenario_tick(game, samples)
+        timed(samples, "flowfield_regenerate", path.flowfield_regenerate, path.flowfield)
+        timed(samples, "flowfield_preview", path.flowfield_preview, 1, 1)
+        path.placement_map_dirty = True
+        timed(samples, "placement_map_update", path.placement_map_update)
+        scenario_render(game, samples)
+
+    return game, samples
+
+
+def scenario_splash(iterations: int) -> tuple[Game, Samples]:
+    """
+    Rows of splash towers over a straight path packed with enemies
+    """
+    game = scenario_game()
+
+    for y in (0, 2, c.GRID_HEIGHT_TILES - 3, c.GRID_HEIGHT_TILES - 1):
+        wire = game_build_core(game, (1, y))
+        for x in range(2, c.GRID_WIDTH_TILES - 1):
+            wire = game_build_tower(game, TowerType.SPLASH, wire, c.RIGHT)
+
+    samples: Samples = {}
+    for tick in range(WARMUP_TICKS + iterations):
+        # Twice the spawn rate so the pool stays packed while splash kills
+        scenario_spawn(2)
+        scenario_tick(game, None if tick < WARMUP_TICKS else samples)
+
+    return game, samples
+
+
+def scenario_particles(iterations: int) -> tuple[Game, Samples]:
+    """
+    Particle pool kept full of long lived spinning particles
+    """
+    game = scenario_game()
+
+    samples: Samples = {}
+    for _ in range(iterations):
+        # Top up only, bursting past the limit would evict the whole pool
+        particle_burst(
+            ParticleSpriteType.SPLASH_BIG,
+            count=MAX_PARTICLES - particles.particles_active,
+            position=(c.GRID_WIDTH / 2, c.GRID_HEIGHT / 2),
+            position_variance=c.GRID_HEIGHT,
+            velocity=20,
+            velocity_variance=10,
+            lifespan=1000,
+            lifespan_variance=0,
+        )
+        g.window.fill(c.BLACK)
+        timed(samples, "particles_update", particles_update)
+        timed(samples, "render_particles", particles_render)
+
+    return game, samples
+
+
+def scenario_stress(iterations: int) -> tuple[Game, Samples]:
+    """
+    Stress wave preset, thousands of enemies past a few rows of towers
+    """
+    game = scenario_game()
+    wave_reset("stress")
+
+    for y in (0, c.GRID_HEIGHT_TILES - 1):
+        wire = game_build_core(game, (1, y))
+        for x in range(2, c.GRID_WIDTH_TILES - 1):
+            wire = game_build_tower(game, TowerType.NORMAL, wire, c.RIGHT)
+
+    samples: Samples = {}
+    for tick in range(WARMUP_TICKS + iterations):
+        if tick < WARMUP_TICKS:
+            scenario_tick(game, None)
+            continue
+        scenario_tick(game, samples)
+        g.window.fill(c.BLACK)
+        timed(samples, "render_enemies", render_enemies)
+
+    return game, samples
+
+
+def scenario_large(iterations: int) -> tuple[Game, Samples]:
+    """
+    Full enemy pool on a large map, camera scrolled to the middle of it
+    """
+    default_grid = (c.GRID_WIDTH_TILES, c.GRID_HEIGHT_TILES)
+    setup_grid(*LARGE_GRID)
+    game = scenario_game()
+
+    start_x, start_y = path.PATH_START_TILE
+    wire = game_build_core(game, (start_x + 2, start_y - 4))
+    for _ in range(8):
+        wire = game_build_tower(game, TowerType.NORMAL, wire, c.DOWN)
+    camera_pan(g.camera, c.GRID_WIDTH / 2, 0)
+
+    samples: Samples = {}
+    for tick in range(WARMUP_TICKS + iterations):
+        scenario_spawn(1)
+        if tick < WARMUP_TICKS:
+            scenario_tick(game, None)
+            continue
+        scenario_tick(game, samples)
+        scenario_render(game, samples)
+
+        # Whole grid passes, only run when towers change so sample fewer
+        if tick % LARGE_PATHING_EVERY == 0:
+            timed(samples, "flowfield_regenerate", path.flowfield_regenerate, path.flowfield)
+            timed(samples, "flowfield_preview", path.flowfield_preview, start_x + 4, start_y)
+            path.placement_map_dirty = True
+            timed(samples, "placement_map_update", path.placement_map_update)
+
+    setup_grid(*default_grid)
+    return game, samples
+
+
+SCENARIOS = {
+    "maze": scenario_maze,
+    "splash": scenario_splash,
+    "particles": scenario_particles,
+    "stress": scenario_stress,
+    "large": scenario_large,
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "scenarios", nargs="*", help=f"any of {', '.join(SCENARIOS)} (default all)"
+    )
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", metavar="PATH", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name}")
+
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+
+    rng_seed(args.seed)
+    setup()
+
+    results = {}
+    for name in args.scenarios or SCENARIOS:
+        rng_seed(args.seed)
+        game, samples = SCENARIOS[name](args.iterations)
+        results[name] = {
+            "towers": len(game.towers),
+            "enemies": e.active_enemies,
+            "particles": particles.particles_active,
+            "particles_dropped": particles.particles_dropped,
+            "particles_evicted": particles.particles_evicted,
+            "timings": {key: summarise(value) for key, value in samples.items()},
+        }
+
+    report = {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "iterations": args.iterations,
+        "seed": args.seed,
+        "scenarios": results,
+    }
+
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -58,6 +58,10 @@ def animator_update(animator: Animator, dt: float) -> None:
     if animator.state_id is not None:
         current_animation = animator.animations[animator.state_id]
 
+    # No frames loaded (headless), nothing to advance
+    if not current_animation.frames:
+        return
+
     if animator.elapsed_time > current_animation.frame_duration:
         animator.frame_index += 1
         if animator.frame_index >= len(current_animation.frames):
@@ -1,6 +1,8 @@
 from enum import IntEnum, auto
 import pygame
 
+import core.constants as c
+
 
 class AudioChannel(IntEnum):
     UI = 0
@@ -13,10 +15,14 @@ class AudioChannel(IntEnum):
 
 
 def set_music_volume(value: float) -> None:
+    if c.IS_HEADLESS:
+        return
     pygame.mixer.Channel(AudioChannel.MUSIC).set_volume(value / 2)
 
 
 def set_sfx_volume(value: float) -> None:
+    if c.IS_HEADLESS:
+        return
     for channel in AudioChannel:
         if channel != AudioChannel.MUSIC:
             pygame.mixer.Channel(channel).set_volume(value / 2)
@@ -26,6 +32,8 @@ def channel_busy(channel: AudioChannel) -> bool:
     """
     Returns true if the channel is currently playing a sound
     """
+    if c.IS_HEADLESS:
+        return False
     return pygame.mixer.Channel(channel).get_busy()
 
 
@@ -33,6 +41,8 @@ def play_sound(channel: AudioChannel, sound: pygame.mixer.Sound, *args) -> None:
     """
     Play sound in the channel, overriding any existing sound in that channel
     """
+    if c.IS_HEADLESS:
+        return
     pygame.mixer.Channel(channel).play(sound, *args)
 
 
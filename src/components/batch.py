@@ -0,0 +1,44 @@
+"""
+Render queue for world sprites. Render functions queue (surface, position)
+pairs on a layer instead of blitting, and batch_flush draws every layer in
+order with a single fblits call each.
+
+Only sprites that are never changed after being queued can go through here,
+particles set their own alpha on shared surfaces so still blit directly.
+"""
+
+from enum import IntEnum
+
+import pygame
+
+import core.globals as g
+import components.dirty as dirty
+from utilities.math import Pos
+
+
+# Same order the game draws them in
+class Layer(IntEnum):
+    INVALID = 0
+    TOWERS = 1
+    ENEMIES = 2
+    PATH = 3
+
+
+_queues: list[list[tuple[pygame.Surface, Pos]]] = [[] for _ in Layer]
+
+
+def batch_add(layer: Layer, surf: pygame.Surface, position: Pos) -> None:
+    _queues[layer].append((surf, position))
+
+
+def batch_flush() -> None:
+    for queue in _queues:
+        if not queue:
+            continue
+        if dirty.dirty_enabled:
+            # fblits doesn't say where it drew
+            for rect in g.window.blits(queue):
+                dirty.dirty_mark(rect)
+        else:
+            g.window.fblits(queue)
+        queue.clear()
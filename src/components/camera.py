@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-import random
+from dataclasses import dataclass, field
+import math
 import pygame
 
 import core.constants as c
@@ -19,6 +19,8 @@ class Camera:
     max_shake_offset: pygame.Vector2
     trauma: float = 0.0
     max_shake_duration: float = 2.0
+    # How far camera_pan can move, zero when the whole world fits on screen
+    max_position: pygame.Vector2 = field(default_factory=pygame.Vector2)
 
 
 def camera_rect(camera: Camera) -> pygame.Rect:
@@ -42,6 +44,55 @@ def camera_follow(camera: Camera, x: float, y: float, speed: float = 8) -> None:
         )
 
 
+def camera_fit(camera: Camera, width: float, height: float) -> None:
+    """
+    Frames a width by height world between the hud bars and side borders.
+    Centred on any axis it fits on, otherwise pannable from the top left
+    """
+    view_width = c.WINDOW_WIDTH - 4 * c.TILE_SIZE
+    view_height = c.WINDOW_HEIGHT - 2 * c.TILE_SIZE
+
+    if width <= view_width:
+        camera.offset.x = c.WINDOW_WIDTH // 2 - width // 2
+        camera.max_position.x = 0
+    else:
+        camera.offset.x = 2 * c.TILE_SIZE
+        camera.max_position.x = width - view_width
+
+    if height <= view_height:
+        camera.offset.y = c.WINDOW_HEIGHT // 2 - height // 2
+        camera.max_position.y = 0
+    else:
+        camera.offset.y = c.TILE_SIZE
+        camera.max_position.y = height - view_height
+
+    camera.motion.position = pygame.Vector2()
+
+
+def camera_pan(camera: Camera, dx: float, dy: float) -> None:
+    position = camera.motion.position
+    position.x = clamp(position.x + dx, 0, camera.max_position.x)
+    position.y = clamp(position.y + dy, 0, camera.max_position.y)
+
+
+def camera_visible_tiles(camera: Camera) -> tuple[range, range]:
+    """
+    Columns and rows of the grid that are on screen, including shake
+    """
+    x = camera.motion.position.x - camera.offset.x - camera.shake_offset.x
+    y = camera.motion.position.y - camera.offset.y - camera.shake_offset.y
+    return (
+        range(
+            max(math.floor(x / c.TILE_SIZE), 0),
+            min(math.ceil((x + c.WINDOW_WIDTH) / c.TILE_SIZE), c.GRID_WIDTH_TILES),
+        ),
+        range(
+            max(math.floor(y / c.TILE_SIZE), 0),
+            min(math.ceil((y + c.WINDOW_HEIGHT) / c.TILE_SIZE), c.GRID_HEIGHT_TILES),
+        ),
+    )
+
+
 def camera_update(camera: Camera, dt: float) -> None:
     # Update shake
     camera.trauma -= dt / camera.max_shake_duration
@@ -49,9 +100,9 @@ def camera_update(camera: Camera, dt: float) -> None:
     if camera.trauma > 0 and g.setting_params["screenshake"][0]:
         shake = camera.trauma**3  # NOTE: Can square trauma too
         camera.shake_offset.x = camera.max_shake_offset.x * shake
-        camera.shake_offset.x *= random.uniform(-1, 1)
+        camera.shake_offset.x *= g.camera_rng.uniform(-1, 1)
         camera.shake_offset.y = camera.max_shake_offset.y * shake
-        camera.shake_offset.y *= random.uniform(-1, 1)
+        camera.shake_offset.y *= g.camera_rng.uniform(-1, 1)
     elif camera.trauma < 0:
         camera.shake_offset.x = 0
         camera.shake_offset.y = 0
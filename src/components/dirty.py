@@ -0,0 +1,93 @@
+"""
+Optional dirty rectangle presenting. Everything is still drawn to the window
+every frame, but only screen cells marked with dirty_mark this frame or last
+frame (where things moved away from) are pushed to the screen. Anything that
+moves the whole picture, like camera shake or scrolling, calls dirty_mark_full
+to fall back to a full flip.
+"""
+
+import pygame
+
+import core.constants as c
+
+
+DIRTY_CELL_SIZE = c.TILE_SIZE
+DIRTY_COLUMNS = -(-c.WINDOW_WIDTH // DIRTY_CELL_SIZE)
+DIRTY_ROWS = -(-c.WINDOW_HEIGHT // DIRTY_CELL_SIZE)
+
+dirty_enabled = False
+# Flip the whole window on the next dirty_present
+dirty_full = True
+
+# 1 for every cell drawn to this frame, and last frame
+_cells = bytearray(DIRTY_COLUMNS * DIRTY_ROWS)
+_last_cells = bytearray(DIRTY_COLUMNS * DIRTY_ROWS)
+
+
+def dirty_mark(rect: pygame.Rect) -> pygame.Rect:
+    """
+    Marks the cells rect covers, pass it what window.blit returns.
+    Returns rect so calls can wrap blits
+    """
+    if not dirty_enabled:
+        return rect
+
+    x0 = max(rect.left // DIRTY_CELL_SIZE, 0)
+    x1 = min((rect.right - 1) // DIRTY_CELL_SIZE, DIRTY_COLUMNS - 1)
+    y0 = max(rect.top // DIRTY_CELL_SIZE, 0)
+    y1 = min((rect.bottom - 1) // DIRTY_CELL_SIZE, DIRTY_ROWS - 1)
+
+    if x0 <= x1:
+        run = b"\x01" * (x1 - x0 + 1)
+        for y in range(y0, y1 + 1):
+            row = y * DIRTY_COLUMNS
+            _cells[row + x0 : row + x1 + 1] = run
+
+    return rect
+
+
+def dirty_mark_full() -> None:
+    global dirty_full
+    dirty_full = True
+
+
+def dirty_present() -> None:
+    """
+    Call instead of pygame.display.flip
+    """
+    global dirty_full
+
+    if not dirty_enabled or dirty_full:
+        pygame.display.flip()
+    else:
+        # Or both frames together, marked cells are always 1
+        size = len(_cells)
+        cells = (int.from_bytes(_cells, "big") | int.from_bytes(_last_cells, "big")).to_bytes(
+            size, "big"
+        )
+
+        # One rect per run of marked cells in a row
+        rects = []
+        for y in range(DIRTY_ROWS):
+            row = y * DIRTY_COLUMNS
+            end = row + DIRTY_COLUMNS
+            start = cells.find(1, row, end)
+            while start != -1:
+                stop = cells.find(0, start, end)
+                if stop == -1:
+                    stop = end
+                rects.append(
+                    pygame.Rect(
+                        (start - row) * DIRTY_CELL_SIZE,
+                        y * DIRTY_CELL_SIZE,
+                        (stop - start) * DIRTY_CELL_SIZE,
+                        DIRTY_CELL_SIZE,
+                    )
+                )
+                start = cells.find(1, stop, end)
+
+        pygame.display.update(rects)
+
+    _last_cells[:] = _cells
+    _cells[:] = bytes(len(_cells))
+    dirty_full = False
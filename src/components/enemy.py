@@ -1,29 +1,19 @@
 from dataclasses import dataclass
 from enum import IntEnum
+from itertools import repeat
 
 import pygame
 
-from components.animation import (
-    Animation,
-    Animator,
-    animator_get_frame,
-    animator_initialise,
-    animator_update,
-)
+from components.animation import Animation
 from components.audio import AudioChannel, play_sound
 import core.globals as g
 import core.constants as c
 
-from components.pathing import (
-    PATH_START_POS,
-    PATH_START_TILE,
-    PATH_END_POS,
-    PATH_END_TILE,
-    flowfield,
-    inside_grid,
-)
+# Start and end move when the grid is resized, so always look them up
+import components.pathing as path
 import components.player as p
 from components.camera import camera_to_screen
+from components.batch import Layer, batch_add
 from utilities.math import clamp
 
 
@@ -41,28 +31,6 @@ class EnemyType(IntEnum):
     FLYING_HEAVY = 7
 
 
-@dataclass(slots=True)
-class Enemy:
-    type: EnemyType = EnemyType.GROUND
-    x: float = 0
-    y: float = 0
-
-    # cell x, cell y
-    cx: int = 0
-    cy: int = 0
-
-    health: int = 0
-    max_health: int = 0
-
-    slow_timer: int = 0
-
-    slow_timer: int = 0
-
-    # visual
-    direction: str = c.RIGHT
-    animator: Animator | None = None
-
-
 @dataclass(frozen=True)
 class EnemyStat:
     health: int
@@ -111,53 +79,162 @@ for enemy_type in EnemyType:
     )
     ENEMY_ANIMATIONS.append(animation)
 
+# Damaged enemies fade towards half alpha, baked into this many steps
+ENEMY_FADE_BUCKETS = 8
+ENEMY_DIRECTIONS = {c.RIGHT: 0, c.UP: 1, c.DOWN: 2, c.LEFT: 3}
+
+
+def _enemy_fade_variants(frame: pygame.Surface) -> list[pygame.Surface]:
+    """
+    Faded copies of frame, indexed by health bucket, last one is full health
+    """
+    variants = []
+    for bucket in range(ENEMY_FADE_BUCKETS):
+        surf = frame.copy()
+        surf.set_alpha(255 * ((bucket + 0.5) / ENEMY_FADE_BUCKETS * 0.5 + 0.5))
+        variants.append(surf)
+    variants.append(frame)
+    return variants
+
+
+# Every frame of every type pre-rotated and faded,
+#  indexed by [type][frame][direction][health bucket]
+ENEMY_SPRITES: list[list[list[list[pygame.Surface]]]] = []
+
+for enemy_type in EnemyType:
+    stat = ENEMY_STATS[enemy_type.value]
+    frames = []
+    for frame in ENEMY_ANIMATIONS[enemy_type.value].frames:
+        if stat.anim_rotate:
+            frames.append(
+                [
+                    _enemy_fade_variants(pygame.transform.rotate(frame, angle))
+                    for angle in (0, 90, -90, 180)
+                ]
+            )
+        else:
+            frames.append([_enemy_fade_variants(frame)] * len(ENEMY_DIRECTIONS))
+    ENEMY_SPRITES.append(frames)
+
+# Per type values the update needs, indexed by EnemyType
+ENEMY_SPEEDS = [stat.speed * c.TILE_SIZE for stat in ENEMY_STATS]
+ENEMY_FLYING = [stat.flying for stat in ENEMY_STATS]
+ENEMY_FRAME_COUNTS = [len(animation.frames) for animation in ENEMY_ANIMATIONS]
+ENEMY_FRAME_DURATIONS = [animation.frame_duration for animation in ENEMY_ANIMATIONS]
 
-MAX_ENEMIES = 100
+# Indexed by flowfield direction, enemies walk against the direction a cell was reached from.
+# Trapped cells are -1, which wraps around to 3 and walks right
+_STEP_X = [-dx for dx, _ in c.DIRECTIONS]
+_STEP_Y = [-dy for _, dy in c.DIRECTIONS]
+_STEP_DIRECTIONS = [ENEMY_DIRECTIONS[d] for d in (c.DOWN, c.LEFT, c.UP, c.RIGHT)]
+_STEP_RIGHT = 3
+
+
+# Starting pool size, doubles whenever it fills up so no spawn is ever dropped
+ENEMY_POOL_SIZE = 100
 
 # Utilising object pooling in a packed array with active count
 # No need to order enemies because they path in a flowfield and would
 #  get out of order very fast, just need to update all enemies every tick.
-enemies = [Enemy() for _ in range(MAX_ENEMIES)]
+# The pool is stored as columns, index i in every list is the same enemy and
+#  only the first active_enemies are alive. Updates go a column at a time.
+enemy_types: list[EnemyType] = []
+enemy_x: list[float] = []
+enemy_y: list[float] = []
+# cell x, cell y
+enemy_cx: list[int] = []
+enemy_cy: list[int] = []
+enemy_health: list[float] = []
+enemy_max_health: list[int] = []
+enemy_slow: list[int] = []
+# visual
+enemy_direction: list[int] = []  # ENEMY_DIRECTIONS value
+enemy_frame: list[int] = []
+enemy_frame_time: list[float] = []
+# Towers target an enemy by slot, which moves with it when removals shuffle the pool.
+# A removed enemy's slot is reused by the next spawn into its place
+enemy_slot: list[int] = []  # slot at each index
+enemy_index: list[int] = []  # index of each slot
+
+_columns = (
+    enemy_types,
+    enemy_x,
+    enemy_y,
+    enemy_cx,
+    enemy_cy,
+    enemy_health,
+    enemy_max_health,
+    enemy_slow,
+    enemy_direction,
+    enemy_frame,
+    enemy_frame_time,
+    enemy_slot,
+)
+
 active_enemies = 0
 enemy_health_multiplier = 1
 
+# Active enemy indices bucketed by position so towers only check enemies near
+# them. Rebuilt every tick once enemies have moved. Enemies outside the grid
+# go in the nearest edge bucket.
+BUCKET_SIZE = 2 * c.TILE_SIZE
+BUCKETS_WIDTH = -(-c.GRID_WIDTH // BUCKET_SIZE)
+BUCKETS_HEIGHT = -(-c.GRID_HEIGHT // BUCKET_SIZE)
+enemy_buckets: list[list[int]] = [[] for _ in range(BUCKETS_WIDTH * BUCKETS_HEIGHT)]
+# Indices of non empty buckets, so big grids don't clear every bucket each tick
+enemy_buckets_used: list[int] = []
+
+
+def _enemy_pool_grow(count: int) -> None:
+    size = len(enemy_slot)
+    enemy_types.extend(repeat(EnemyType.GROUND, count))
+    for column in (enemy_x, enemy_y, enemy_frame_time):
+        column.extend(repeat(0.0, count))
+    for column in (enemy_cx, enemy_cy, enemy_health, enemy_max_health, enemy_slow, enemy_frame):
+        column.extend(repeat(0, count))
+    enemy_direction.extend(repeat(ENEMY_DIRECTIONS[c.RIGHT], count))
+    enemy_slot.extend(range(size, size + count))
+    enemy_index.extend(range(size, size + count))
+
+
+_enemy_pool_grow(ENEMY_POOL_SIZE)
+
 
-def enemy_spawn(enemy_type: EnemyType) -> bool:
+def enemy_spawn(enemy_type: EnemyType) -> None:
     """
     Simply add to end of packed array.
+    Pool doubles in size when full so growth is amortised.
     """
     global active_enemies
 
-    if active_enemies >= MAX_ENEMIES:
-        return False
+    if active_enemies >= len(enemy_slot):
+        _enemy_pool_grow(len(enemy_slot))
 
     stat = ENEMY_STATS[enemy_type]
 
-    new_enemy = enemies[active_enemies]
-    new_enemy.type = enemy_type
+    i = active_enemies
+    enemy_types[i] = enemy_type
 
-    new_enemy.x, new_enemy.y = PATH_START_POS
+    enemy_x[i], enemy_y[i] = path.PATH_START_POS
     # if not stat.flying:
-    #     new_enemy.x, new_enemy.y = PATH_START_POS
+    #     enemy_x[i], enemy_y[i] = PATH_START_POS
     # else:
-    #     new_enemy.x, new_enemy.y = (
+    #     enemy_x[i], enemy_y[i] = (
     #         PATH_START_POS[0],
     #         random.choice([0, 1, c.GRID_HEIGHT_TILES - 2, c.GRID_HEIGHT_TILES - 1])
     #         + c.TILE_SIZE // 2,
     #     )
 
-    new_enemy.animator = Animator()
-    animator_initialise(new_enemy.animator, {0: ENEMY_ANIMATIONS[enemy_type.value]})
+    enemy_frame[i] = 0
+    enemy_frame_time[i] = 0.0
 
-    new_enemy.cx, new_enemy.cy = PATH_START_POS
+    enemy_cx[i], enemy_cy[i] = path.PATH_START_POS
 
-    new_enemy.max_health = stat.health * enemy_health_multiplier
-    new_enemy.health = new_enemy.max_health
+    enemy_max_health[i] = stat.health * enemy_health_multiplier
+    enemy_health[i] = enemy_max_health[i]
 
     active_enemies += 1
 
-    return True
-
 
 def enemy_remove(i: int) -> None:
     """
@@ -166,122 +243,235 @@ def enemy_remove(i: int) -> None:
     """
     global active_enemies
 
-    temp = enemies[i]
-
     # decrement first so easier end indexing
     active_enemies -= 1
+    last = active_enemies
 
-    enemies[i] = enemies[active_enemies]
-    enemies[active_enemies] = temp
+    for column in _columns:
+        column[i], column[last] = column[last], column[i]
+    enemy_index[enemy_slot[i]] = i
+    enemy_index[enemy_slot[last]] = last
 
 
-def enemy_update(i: int) -> bool:
+def enemies_update() -> None:
     """
-    Moves enemy toward target by speed
+    Moves every enemy toward its target by speed
     If target reached, find next target --> if at END_POS then GOAL_POS
-    If dead then remove
+    If dead or made it through then remove
 
-    RETURN: whether died, because if died then dont increment i for next
+    Each column of the pool is updated in one go. Removal happens last but
+    visits enemies in the same order a single pass over the pool would.
     """
-    enemy = enemies[i]
-
-    stat = ENEMY_STATS[enemy.type]
-
-    # Dead then no need to update
-    if enemy.health <= 0:
-        p.score_add(stat.health)
-        return True
-
-    animator_update(enemy.animator, g.dt)
-
-    speed = stat.speed * c.TILE_SIZE
-    if enemy.slow_timer > 0:
-        enemy.slow_timer -= 1
-        speed /= 2
-
-    enemy.direction = c.RIGHT
-
-    # Travelling to start
-    if (enemy.cx, enemy.cy) == PATH_START_POS:
-        enemy.x += speed
-        # Reached start of map
-        if enemy.x >= PATH_START_TILE[0] * c.TILE_SIZE:
-            enemy.cx, enemy.cy = PATH_START_TILE
-
-    # Travelling to goal
-    elif (enemy.cx, enemy.cy) == PATH_END_TILE:
-        enemy.x += speed
-        # Reached end of screen
-        if enemy.x >= PATH_END_POS[0]:
-            p.player.health -= 1
-            play_sound(AudioChannel.PLAYER, g.PLAYER_SFX[0])
-            g.camera.trauma = 0.35
-            enemy.health = 0  # Set to dead so tower can see that it died
-            return True
-
-    # Reached next cell pos
+    n = active_enemies
+    if n == 0:
+        return
+
+    start_x, start_y = path.PATH_START_POS
+    start_cx, start_cy = path.PATH_START_TILE
+    start_tile_x = start_cx * c.TILE_SIZE
+    end_cx, end_cy = path.PATH_END_TILE
+    end_x = path.PATH_END_POS[0]
+    half_tile = c.TILE_SIZE // 2
+    max_cx, max_cy = c.GRID_WIDTH_TILES - 1, c.GRID_HEIGHT_TILES - 1
+    grid_width, grid_height = c.GRID_WIDTH, c.GRID_HEIGHT
+    speeds, flying = ENEMY_SPEEDS, ENEMY_FLYING
+    step_x, step_y = _STEP_X, _STEP_Y
+    field = path.flowfield.directions
+    width = c.GRID_WIDTH_TILES
+    tile = c.TILE_SIZE
+    dt = g.dt
+
+    types = enemy_types[:n]
+    xs, ys = enemy_x[:n], enemy_y[:n]
+    cxs, cys = enemy_cx[:n], enemy_cy[:n]
+    health = enemy_health[:n]
+    slow = enemy_slow[:n]
+
+    # Dead enemies are only removed, they don't move or tick down
+    alive = [h > 0 for h in health]
+
+    speed = [speeds[t] / 2 if s > 0 else speeds[t] for t, s in zip(types, slow)]
+    enemy_slow[:n] = [s - 1 if s > 0 and a else s for s, a in zip(slow, alive)]
+
+    # Headless has no frames to advance
+    if ENEMY_FRAME_COUNTS[0]:
+        counts, durations = ENEMY_FRAME_COUNTS, ENEMY_FRAME_DURATIONS
+        times = [time + dt for time in enemy_frame_time[:n]]
+        advance = [time > durations[t] for time, t in zip(times, types)]
+        enemy_frame[:n] = [
+            (frame + 1) % counts[t] if a else frame
+            for frame, a, t in zip(enemy_frame[:n], advance, types)
+        ]
+        enemy_frame_time[:n] = [0.0 if a else time for time, a in zip(times, advance)]
+
+    # 0 travelling to start, 1 travelling to goal, 2 on the grid
+    modes = [
+        0 if cx == start_x and cy == start_y else 1 if cx == end_cx and cy == end_cy else 2
+        for cx, cy in zip(cxs, cys)
+    ]
+    # Incase this happens safety
+    lost = [
+        m == 2 and not (0 <= x < grid_width and 0 <= y < grid_height)
+        for m, x, y in zip(modes, xs, ys)
+    ]
+    # Off the grid or flying straight right, otherwise pathfind
+    steps = [
+        _STEP_RIGHT if m < 2 or flying[t] else field[cy * width + cx] % 4
+        for m, t, cx, cy in zip(modes, types, cxs, cys)
+    ]
+
+    if False in alive or True in lost:
+        moving = [a and not l for a, l in zip(alive, lost)]
+        xs = [x + step_x[d] * s if move else x for x, d, s, move in zip(xs, steps, speed, moving)]
+        ys = [y + step_y[d] * s if move else y for y, d, s, move in zip(ys, steps, speed, moving)]
     else:
-        # Incase this happens safety
-        if not inside_grid(enemy.x//c.TILE_SIZE, enemy.y//c.TILE_SIZE):
-            p.player.health -= 1
-            play_sound(AudioChannel.PLAYER, g.PLAYER_SFX[0])
-            g.camera.trauma = 0.3
-            enemy.health = 0  # Set to dead so tower can see that it died
-            return True
-
-        # pathfind
-        if not stat.flying:
-            d = flowfield[enemy.cy][enemy.cx]
-            if d == -1:
-                d = 3  # trapped, jus move right
-            dx, dy = c.DIRECTIONS[d]
-            xv, yv = -dx * speed, -dy * speed
-        # fly
+        xs = [x + step_x[d] * s for x, d, s in zip(xs, steps, speed)]
+        ys = [y + step_y[d] * s for y, d, s in zip(ys, steps, speed)]
+    enemy_x[:n] = xs
+    enemy_y[:n] = ys
+    enemy_direction[:n] = [_STEP_DIRECTIONS[d] for d in steps]
+
+    # Reached start of map, or the next cell pos accounting for the size of the enemy
+    enemy_cx[:n] = [
+        (
+            (
+                0
+                if (tx := (round(x) - step_x[d] * half_tile) // tile) < 0
+                else max_cx if tx > max_cx else tx
+            )
+            if m == 2
+            else start_cx if m == 0 and x >= start_tile_x else cx
+        )
+        for m, x, d, cx in zip(modes, xs, steps, cxs)
+    ]
+    enemy_cy[:n] = [
+        (
+            (
+                0
+                if (ty := (round(y) - step_y[d] * half_tile) // tile) < 0
+                else max_cy if ty > max_cy else ty
+            )
+            if m == 2
+            else start_cy if m == 0 and x >= start_tile_x else cy
+        )
+        for m, x, y, d, cy in zip(modes, xs, ys, steps, cys)
+    ]
+
+    # Dead, lost, or reached end of screen
+    remove = [not a or l or (m == 1 and x >= end_x) for a, l, m, x in zip(alive, lost, modes, xs)]
+    if True not in remove:
+        return
+
+    i = 0
+    while True:
+        try:
+            i = remove.index(True, i, n)
+        except ValueError:
+            break
+
+        if enemy_health[i] <= 0:
+            p.score_add(ENEMY_STATS[enemy_types[i]].health)
         else:
-            xv, yv = speed, 0
+            enemy_escape(0.3 if lost[i] else 0.35)
+            enemy_health[i] = 0  # Set to dead so tower can see that it died
 
-        enemy.x += xv
-        enemy.y += yv
+        n -= 1
+        remove[i], remove[n] = remove[n], remove[i]
+        lost[i], lost[n] = lost[n], lost[i]
+        enemy_remove(i)
 
-        rx, ry = round(enemy.x), round(enemy.y)
 
-        # add to rx and ry to account for the size of the enemy
-        if xv > 0:  # going right
-            rx -= c.TILE_SIZE // 2
-        elif xv < 0:  # going left (idk if this ever occurs)
-            rx += c.TILE_SIZE // 2
-            enemy.direction = c.LEFT
-        if yv < 0:  # going up
-            ry += c.TILE_SIZE // 2
-            enemy.direction = c.UP
-        elif yv > 0:  # going down
-            ry -= c.TILE_SIZE // 2
-            enemy.direction = c.DOWN
+def enemy_escape(trauma: float) -> None:
+    p.player.health -= 1
+    play_sound(AudioChannel.PLAYER, g.PLAYER_SFX[0])
+    g.camera.trauma = trauma
 
-        enemy.cx = clamp(rx // c.TILE_SIZE, 0, c.GRID_WIDTH_TILES - 1)
-        enemy.cy = clamp(ry // c.TILE_SIZE, 0, c.GRID_HEIGHT_TILES - 1)
 
-    return False
+def enemy_buckets_resize() -> None:
+    """
+    Matches the buckets to the current grid size
+    """
+    global BUCKETS_WIDTH, BUCKETS_HEIGHT
+
+    BUCKETS_WIDTH = -(-c.GRID_WIDTH // BUCKET_SIZE)
+    BUCKETS_HEIGHT = -(-c.GRID_HEIGHT // BUCKET_SIZE)
+    enemy_buckets[:] = [[] for _ in range(BUCKETS_WIDTH * BUCKETS_HEIGHT)]
+    enemy_buckets_used.clear()
+    enemy_buckets_rebuild()
+
+
+def enemy_buckets_rebuild() -> None:
+    for b in enemy_buckets_used:
+        enemy_buckets[b].clear()
+    enemy_buckets_used.clear()
+
+    n = active_enemies
+    max_bx, max_by = BUCKETS_WIDTH - 1, BUCKETS_HEIGHT - 1
+    cells = [
+        (0 if (by := int(y // BUCKET_SIZE)) < 0 else max_by if by > max_by else by) * BUCKETS_WIDTH
+        + (0 if (bx := int(x // BUCKET_SIZE)) < 0 else max_bx if bx > max_bx else bx)
+        for x, y in zip(enemy_x[:n], enemy_y[:n])
+    ]
+    for i, cell in enumerate(cells):
+        bucket = enemy_buckets[cell]
+        if not bucket:
+            enemy_buckets_used.append(cell)
+        bucket.append(i)
+
+
+def enemy_buckets_near(x: float, y: float, radius: float) -> list[list[int]]:
+    """
+    Buckets overlapping the square around the circle.
+    Only valid after enemy_buckets_rebuild this tick.
+    """
+    bx0 = clamp(int((x - radius) // BUCKET_SIZE), 0, BUCKETS_WIDTH - 1)
+    bx1 = clamp(int((x + radius) // BUCKET_SIZE), 0, BUCKETS_WIDTH - 1)
+    by0 = clamp(int((y - radius) // BUCKET_SIZE), 0, BUCKETS_HEIGHT - 1)
+    by1 = clamp(int((y + radius) // BUCKET_SIZE), 0, BUCKETS_HEIGHT - 1)
+
+    near = []
+    for by in range(by0, by1 + 1):
+        row = by * BUCKETS_WIDTH
+        near += enemy_buckets[row + bx0 : row + bx1 + 1]
+    return near
+
+
+def enemy_find_in_radius(x: float, y: float, radius: float) -> int | None:
+    """
+    Slot of the first enemy in the pool within radius, same pick as scanning the whole pool
+    """
+    r2 = radius * radius
+    best = active_enemies
+    for bucket in enemy_buckets_near(x, y, radius):
+        # Buckets are filled in pool order so first hit is lowest index
+        for i in bucket:
+            if i >= best:
+                break
+            dx, dy = enemy_x[i] - x, enemy_y[i] - y
+            if dx * dx + dy * dy < r2:
+                best = i
+                break
+
+    return enemy_slot[best] if best < active_enemies else None
 
 
 def enemy_render(i: int) -> None:
-    enemy = enemies[i]
-    stat = ENEMY_STATS[enemy.type.value]
-
-    surf = animator_get_frame(enemy.animator)
-    if enemy.health < enemy.max_health:
-        surf = surf.copy()
-        surf.set_alpha(255 * (enemy.health / enemy.max_health * 0.5 + 0.5))
-    if stat.anim_rotate:
-        surf = pygame.transform.rotate(
-            surf, {c.RIGHT: 0, c.UP: 90, c.DOWN: -90, c.LEFT: 180}[enemy.direction]
-        )
+    type = enemy_types[i]
+    size = ENEMY_STATS[type].size
+    health, max_health = enemy_health[i], enemy_max_health[i]
+
+    if health < max_health:
+        bucket = int(max(health, 0) * ENEMY_FADE_BUCKETS // max_health)
+    else:
+        bucket = ENEMY_FADE_BUCKETS
+    surf = ENEMY_SPRITES[type][enemy_frame[i]][enemy_direction[i]][bucket]
 
-    g.window.blit(
+    batch_add(
+        Layer.ENEMIES,
         surf,
         camera_to_screen(
             g.camera,
-            enemy.x - (c.TILE_SIZE * stat.size) // 2,
-            enemy.y - (c.TILE_SIZE * stat.size) // 2,
+            enemy_x[i] - (c.TILE_SIZE * size) // 2,
+            enemy_y[i] - (c.TILE_SIZE * size) // 2,
         ),
     )
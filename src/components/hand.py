@@ -5,7 +5,9 @@ import pygame
 
 import core.constants as c
 import core.globals as g
+from components.dirty import dirty_mark
 from utilities.math import Pos
+from utilities.text import text_render
 
 
 @dataclass(slots=True)
@@ -33,6 +35,8 @@ class HandType(Enum):
 class Tooltip:
     title: str
     lines: list[tuple[int, str]] | None = None
+    # Set on first render, tooltips are not changed once shown
+    surface: pygame.Surface | None = None
 
 
 @dataclass(slots=True)
@@ -46,9 +50,11 @@ hand = Hand()
 
 def hand_render():
     data = hand.type.value
-    g.window.blit(
-        g.HANDS[data.sprite_index],
-        (g.mouse_pos[0] - data.render_offset[0], g.mouse_pos[1] - data.render_offset[1]),
+    dirty_mark(
+        g.window.blit(
+            g.HANDS[data.sprite_index],
+            (g.mouse_pos[0] - data.render_offset[0], g.mouse_pos[1] - data.render_offset[1]),
+        )
     )
 
     if hand.tooltip is not None:
@@ -62,18 +68,24 @@ def hand_render():
             ry -= surf.get_height() + 4
         else:
             ry += 12
-        g.window.blit(surf, (rx, ry))
+        dirty_mark(g.window.blit(surf, (rx, ry)))
 
 
 def tooltip_render(tooltip: Tooltip) -> pygame.Surface:
+    if tooltip.surface is None:
+        tooltip.surface = _tooltip_build(tooltip)
+    return tooltip.surface
+
+
+def _tooltip_build(tooltip: Tooltip) -> pygame.Surface:
     if tooltip.lines is None or len(tooltip.lines) == 0:
-        return g.FONT.render(tooltip.title, False, c.WHITE, c.BLACK)
+        return text_render(g.FONT, tooltip.title, c.WHITE, c.BLACK)
 
     lines: list[pygame.Surface] = []
     max_width: float = 0
     height: float = 0
     for icon, ln in [(-1, tooltip.title)] + tooltip.lines:
-        text = g.FONT.render(ln, False, c.WHITE)
+        text = text_render(g.FONT, ln, c.WHITE)
         if icon >= 0:
             surf = pygame.Surface((text.get_width() + 20, text.get_height()))
             surf.blit(g.ICONS[icon], (0, 0))
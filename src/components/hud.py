@@ -1,29 +1,54 @@
+import pygame
+
 from components.camera import camera_to_screen_shake
 import core.constants as c
 import core.globals as g
 
 
+# Bars are fixed to the screen so are built once. Border columns scroll with
+# the map so are rebuilt when its height changes
+hud_bars: tuple[pygame.Surface, pygame.Surface] | None = None
+hud_borders: tuple[pygame.Surface, pygame.Surface] | None = None
+
+
 def hud_render():
+    global hud_bars, hud_borders
+
+    if hud_bars is None:
+        hud_bars = _hud_bars_build()
+    if hud_borders is None or hud_borders[0].get_height() != c.GRID_HEIGHT:
+        hud_borders = _hud_borders_build()
+
+    top, bottom = hud_bars
+    g.window.blit(top, (0, -1))
+    g.window.blit(bottom, (0, c.WINDOW_HEIGHT - c.TILE_SIZE - 4))
+
+    left, right = hud_borders
+    g.window.blit(left, camera_to_screen_shake(g.camera, -2 * c.TILE_SIZE, 0))
+    g.window.blit(right, camera_to_screen_shake(g.camera, c.GRID_WIDTH, 0))
+
+
+def _hud_bars_build() -> tuple[pygame.Surface, pygame.Surface]:
+    top = pygame.Surface((c.WINDOW_WIDTH, c.TILE_SIZE + 4), pygame.SRCALPHA)
+    bottom = pygame.Surface((c.WINDOW_WIDTH, c.TILE_SIZE + 4), pygame.SRCALPHA)
+
     for x in range(c.WINDOW_WIDTH // 14):
-        g.window.blit(g.TERRAIN[7], (x * 14 - 2, -1))
-        g.window.blit(g.TERRAIN[3], (x * 14 - 2, 3))
-        g.window.blit(g.TERRAIN[7], (x * 14 - 2, c.WINDOW_HEIGHT - c.TILE_SIZE))
-        g.window.blit(g.TERRAIN[2], (x * 14 - 2, c.WINDOW_HEIGHT - c.TILE_SIZE - 4))
+        top.blit(g.TERRAIN[7], (x * 14 - 2, 0))
+        top.blit(g.TERRAIN[3], (x * 14 - 2, 4))
+        bottom.blit(g.TERRAIN[7], (x * 14 - 2, 4))
+        bottom.blit(g.TERRAIN[2], (x * 14 - 2, 0))
+
+    return top, bottom
+
+
+def _hud_borders_build() -> tuple[pygame.Surface, pygame.Surface]:
+    left = pygame.Surface((2 * c.TILE_SIZE, c.GRID_HEIGHT), pygame.SRCALPHA)
+    right = pygame.Surface((2 * c.TILE_SIZE, c.GRID_HEIGHT), pygame.SRCALPHA)
 
     for y in range(c.GRID_HEIGHT_TILES):
-        g.window.blit(
-            g.TERRAIN[5],
-            camera_to_screen_shake(g.camera, -1 * c.TILE_SIZE, y * c.TILE_SIZE),
-        )
-        g.window.blit(
-            g.TERRAIN[6],
-            camera_to_screen_shake(g.camera, -2 * c.TILE_SIZE, y * c.TILE_SIZE),
-        )
-        g.window.blit(
-            g.TERRAIN[4],
-            camera_to_screen_shake(g.camera, c.GRID_WIDTH, y * c.TILE_SIZE),
-        )
-        g.window.blit(
-            g.TERRAIN[6],
-            camera_to_screen_shake(g.camera, c.GRID_WIDTH + c.TILE_SIZE, y * c.TILE_SIZE),
-        )
+        left.blit(g.TERRAIN[5], (c.TILE_SIZE, y * c.TILE_SIZE))
+        left.blit(g.TERRAIN[6], (0, y * c.TILE_SIZE))
+        right.blit(g.TERRAIN[4], (0, y * c.TILE_SIZE))
+        right.blit(g.TERRAIN[6], (c.TILE_SIZE, y * c.TILE_SIZE))
+
+    return left, right
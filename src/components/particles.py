@@ -1,14 +1,16 @@
-from dataclasses import dataclass
 from enum import IntEnum
+from itertools import compress, repeat
 import math
-import random
+from operator import lt
 
 import pygame
 
+import core.constants as c
 import core.globals as g
 
-from components.camera import Camera, camera_to_screen_shake
-from components.motion import Motion, motion_update
+from components.camera import camera_to_screen_shake
+from components.dirty import dirty_mark
+from utilities.sprite import rotate_sprite_cached
 
 
 class ParticleSpriteType(IntEnum):
@@ -26,54 +28,113 @@ class ParticleSpriteType(IntEnum):
     ZAP_SMALL = 11
 
 
-@dataclass(slots=True)
-class Particle:
-    sprite: pygame.Surface
-    motion: Motion
-    rotation: float
-    rotational_velocity: float
-    lifespan: int  # total number of frames alive
-    lifetime: int = 0  # current frame
-
-
-MAX_PARTICLES = 200
-_particles: list[Particle] = []
-
-# Instantiate once here before game. values dont matter
-for _ in range(MAX_PARTICLES):
-    particle = Particle(
-        g.PARTICLES[0],
-        Motion(
-            pygame.Vector2(),
-            pygame.Vector2(),
-            pygame.Vector2()
-        ),
-        0.0,
-        0.0,
-        0
-    )
-    _particles.append(particle)
+# Who spawned a particle, each can only own so many of the live particles
+class ParticleEmitter(IntEnum):
+    DEFAULT = 0
+    TOWER = 1
+    TILE = 2
+    SCORE = 3
+
+
+MAX_PARTICLES = 2000
+PARTICLE_BUDGETS = [
+    # ParticleEmitter.DEFAULT
+    MAX_PARTICLES,
+    # ParticleEmitter.TOWER
+    MAX_PARTICLES * 3 // 4,
+    # ParticleEmitter.TILE
+    200,
+    # ParticleEmitter.SCORE
+    16,
+]
+
+# Particles stored as columns, index i in every list is the same particle.
+# The whole pool is updated a column at a time instead of particle by particle,
+#  dead particles are dropped from every column at once with compress.
+# Columns stay in spawn order so the front is always the oldest, a full pool
+#  evicts from there like a ring buffer.
+_emitters: list[int] = []
+_sprites: list[pygame.Surface] = []
+_x: list[float] = []
+_y: list[float] = []
+_vx: list[float] = []
+_vy: list[float] = []
+_rotation: list[float] = []
+_rotational_velocity: list[float] = []
+_lifespan: list[int] = []  # total number of frames alive
+_lifetime: list[int] = []  # current frame
+
+_columns = (
+    _emitters,
+    _sprites,
+    _x,
+    _y,
+    _vx,
+    _vy,
+    _rotation,
+    _rotational_velocity,
+    _lifespan,
+    _lifetime,
+)
 
 particles_active: int = 0
+particle_emitter_counts = [0] * len(ParticleEmitter)
+
+# For profiling, reset by particles_clear
+particles_dropped = 0  # over their emitter budget, never spawned
+particles_evicted = 0  # oldest removed early to make room
+
+
+def _particles_reserve(emitter: ParticleEmitter, count: int) -> int:
+    """
+    Makes room for up to count new particles from emitter, returns how many fit its budget
+    """
+    global particles_active, particles_dropped, particles_evicted
+
+    allowed = max(min(count, PARTICLE_BUDGETS[emitter] - particle_emitter_counts[emitter]), 0)
+    particles_dropped += count - allowed
+
+    overflow = particles_active + allowed - MAX_PARTICLES
+    if overflow > 0:
+        evicted = _emitters[:overflow]
+        for e in ParticleEmitter:
+            particle_emitter_counts[e] -= evicted.count(e)
+        for column in _columns:
+            del column[:overflow]
+        particles_active -= overflow
+        particles_evicted += overflow
+
+    particle_emitter_counts[emitter] += allowed
+    return allowed
 
 
 def particle_spawn(
     sprite: pygame.Surface,
-    motion: Motion,
+    x: float,
+    y: float,
+    vx: float,
+    vy: float,
     rotation: float,
     rotational_velocity: float,
     lifespan: int,
     lifetime: int = 0,
-):
+    emitter: ParticleEmitter = ParticleEmitter.DEFAULT,
+) -> None:
     global particles_active
-    _particles[particles_active].sprite = sprite
-    _particles[particles_active].motion = motion
-    _particles[particles_active].rotation = rotation
-    _particles[particles_active].rotational_velocity = rotational_velocity
-    _particles[particles_active].lifespan = lifespan
-    _particles[particles_active].lifetime = lifetime
-
-    particles_active = min(particles_active + 1, MAX_PARTICLES-1)
+    if _particles_reserve(emitter, 1) == 0:
+        return
+
+    _emitters.append(emitter)
+    _sprites.append(sprite)
+    _x.append(x)
+    _y.append(y)
+    _vx.append(vx)
+    _vy.append(vy)
+    _rotation.append(rotation)
+    _rotational_velocity.append(rotational_velocity)
+    _lifespan.append(lifespan)
+    _lifetime.append(lifetime)
+    particles_active += 1
 
 
 def particle_burst(
@@ -86,75 +147,87 @@ def particle_burst(
     velocity_variance: float,
     lifespan: int,
     lifespan_variance: int,
+    emitter: ParticleEmitter = ParticleEmitter.DEFAULT,
 ) -> None:
+    global particles_active
+
+    # Particles are purely visual
+    if c.IS_HEADLESS:
+        return
 
+    count = _particles_reserve(emitter, count)
+    if count == 0:
+        return
+
+    rng = g.particles_rng
+    uniform = rng.uniform
     for _ in range(count):
         # randomise motion
-        rotation = random.uniform(0, 360)
-        motion = Motion(
-            pygame.Vector2(
-                position[0] + random.uniform(-position_variance / 2, position_variance / 2),
-                position[1] + random.uniform(-position_variance / 2, position_variance / 2),
-            ),
-            pygame.Vector2(
-                velocity * math.cos(math.radians(rotation))
-                + random.uniform(-velocity_variance / 2, velocity_variance / 2),
-                velocity * math.sin(math.radians(rotation))
-                + random.uniform(-velocity_variance / 2, velocity_variance / 2),
-            ),
-            pygame.Vector2(),
+        rotation = uniform(0, 360)
+        _x.append(position[0] + uniform(-position_variance / 2, position_variance / 2))
+        _y.append(position[1] + uniform(-position_variance / 2, position_variance / 2))
+        _vx.append(
+            velocity * math.cos(math.radians(rotation))
+            + uniform(-velocity_variance / 2, velocity_variance / 2)
         )
-
-        # create particle
-        particle_spawn(
-            g.PARTICLES[sprite_type.value],
-            motion,
-            rotation,
-            random.uniform(-500, 500),
-            lifespan + random.randint(-lifespan_variance // 2, lifespan_variance // 2),
+        _vy.append(
+            velocity * math.sin(math.radians(rotation))
+            + uniform(-velocity_variance / 2, velocity_variance / 2)
         )
+        _rotation.append(rotation)
+        _rotational_velocity.append(uniform(-500, 500))
+        _lifespan.append(lifespan + rng.randint(-lifespan_variance // 2, lifespan_variance // 2))
 
-
-def particle_update(particle: Particle) -> None:
-    particle.lifetime += 1
-    motion_update(particle.motion, g.dt)
-    particle.rotation = (particle.rotation + particle.rotational_velocity * g.dt) % 360
+    _emitters.extend(repeat(emitter, count))
+    _sprites.extend(repeat(g.PARTICLES[sprite_type.value], count))
+    _lifetime.extend(repeat(0, count))
+    particles_active += count
 
 
 def particles_update() -> None:
     global particles_active
-    i = 0
-    while i < particles_active:
-        particle = _particles[i]
-        particle_update(particle)
-
-        if particle.lifetime >= particle.lifespan:
-            # Switch with end of array :)) love this trick
-            particles_active -= 1
-            _particles[i] = _particles[particles_active]
-            _particles[particles_active] = particle
-        else:
-            i += 1
-
-
-def particle_render(particle: Particle, camera: Camera) -> None:
-    surf = pygame.transform.rotate(particle.sprite, -particle.rotation)
-    surf.set_alpha((1 - particle.lifetime / particle.lifespan) * 255)
-    g.window.blit(
-        surf,
-        camera_to_screen_shake(
-            camera,
-            particle.motion.position.x - surf.get_width() // 2,
-            particle.motion.position.y - surf.get_height() // 2,
-        ),
-    )
+    if particles_active == 0:
+        return
+
+    dt = g.dt
+    _lifetime[:] = [lifetime + 1 for lifetime in _lifetime]
+    _x[:] = [x + vx * dt for x, vx in zip(_x, _vx)]
+    _y[:] = [y + vy * dt for y, vy in zip(_y, _vy)]
+    _rotation[:] = [
+        (rotation + rv * dt) % 360 for rotation, rv in zip(_rotation, _rotational_velocity)
+    ]
+
+    alive = list(map(lt, _lifetime, _lifespan))
+    if not all(alive):
+        for column in _columns:
+            column[:] = compress(column, alive)
+        particles_active = len(_x)
+        for e in ParticleEmitter:
+            particle_emitter_counts[e] = _emitters.count(e)
 
 
 def particles_render() -> None:
-    for i in range(particles_active):
-        particle_render(_particles[i], g.camera)
+    camera = g.camera
+    for sprite, x, y, rotation, lifespan, lifetime in zip(
+        _sprites, _x, _y, _rotation, _lifespan, _lifetime
+    ):
+        surf = rotate_sprite_cached(sprite, -rotation)
+        surf.set_alpha((1 - lifetime / lifespan) * 255)
+        dirty_mark(
+            g.window.blit(
+                surf,
+                camera_to_screen_shake(
+                    camera, x - surf.get_width() // 2, y - surf.get_height() // 2
+                ),
+            )
+        )
 
 
 def particles_clear() -> None:
-    global particles_active
+    global particles_active, particles_dropped, particles_evicted
+    for column in _columns:
+        column.clear()
     particles_active = 0
+    particle_emitter_counts[:] = [0] * len(ParticleEmitter)
+    particles_dropped = 0
+    particles_evicted = 0
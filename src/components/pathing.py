@@ -1,80 +1,265 @@
-from queue import deque
+from array import array
+from dataclasses import dataclass
 
 import core.constants as c
 
 import components.enemy as e
+from utilities.math import Pos
 
 
 # how far outside is run
 outside = 1 * c.TILE_SIZE
 
-PATH_START_POS = (-outside, c.GRID_HEIGHT / 2)
-PATH_END_POS = (c.GRID_WIDTH + outside, PATH_START_POS[1])
+# Middle of the left and right edges, set by pathing_resize
+PATH_START_POS: tuple[float, float]
+PATH_END_POS: tuple[float, float]
 
 # These are grid tile start
-PATH_START_TILE = (0, c.GRID_HEIGHT_TILES // 2)
-PATH_END_TILE = (c.GRID_WIDTH_TILES - 1, PATH_START_TILE[1])
+PATH_START_TILE: Pos
+PATH_END_TILE: Pos
 
 
+# Grids are flat, cell index is y * GRID_WIDTH_TILES + x
+def tile_to_cell(x: int, y: int) -> int:
+    return y * c.GRID_WIDTH_TILES + x
+
+
+def cell_to_tile(cell: int) -> Pos:
+    y, x = divmod(cell, c.GRID_WIDTH_TILES)
+    return (x, y)
+
+
+def _neighbours_build() -> list[tuple[tuple[int, int], ...]]:
+    """
+    (direction index, cell) for every neighbour of every cell inside the grid
+    """
+    width, height = c.GRID_WIDTH_TILES, c.GRID_HEIGHT_TILES
+    neighbours = []
+    for y in range(height):
+        for x in range(width):
+            cell = []
+            for i, (dx, dy) in enumerate(c.DIRECTIONS):
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < width and 0 <= ny < height:
+                    cell.append((i, ny * width + nx))
+            neighbours.append(tuple(cell))
+    return neighbours
+
+
+def _fill(buffer: array, value: int) -> None:
+    buffer[:] = array(buffer.typecode, (value,)) * len(buffer)
+
+
+cell_neighbours: list[tuple[tuple[int, int], ...]] = []
+
+
+@dataclass(slots=True)
+class Flowfield:
+    # Direction index each cell was reached from, enemies walk against it
+    directions: array
+    # Steps to PATH_END_TILE, -1 if unreachable
+    distances: array
+    # Cells in the order the flood fill reached them, nearest first
+    order: array
+    # Index into order where each distance begins, last entry is len(order)
+    level_starts: list[int]
+
+    @staticmethod
+    def empty():
+        cells = c.GRID_WIDTH_TILES * c.GRID_HEIGHT_TILES
+        return Flowfield(
+            array("b", (-1,)) * cells,
+            array("i", (-1,)) * cells,
+            array("i"),
+            [],
+        )
+
+
+# Grids below are sized by pathing_resize and only ever resized in place,
+# so modules holding on to them never see a stale one
+
 # Flowfield the enemies path off. Must always be valid path.
-flowfield: list[list[int]] = [[-1] * c.GRID_WIDTH_TILES for _ in range(c.GRID_HEIGHT_TILES)]
+flowfield = Flowfield.empty()
 
 # Flowfield the player can place towers off. It takes into account current
 # enemy positions. Expected to be invalid often
-placement_flowfield: list[list[int]] = [
-    [-1] * c.GRID_WIDTH_TILES for _ in range(c.GRID_HEIGHT_TILES)
-]
+placement_flowfield = Flowfield.empty()
+
+# 1 where towers have been placed
+collision_grid = bytearray()
+
+# 1 where a tower would still leave a path, same answer as flowfield_preview
+# except start and end are always invalid.
+# Rebuilt by placement_map_update when collision_grid changes
+placement_map = bytearray()
+# Empty cells that would cut the path off, for shading while dragging
+placement_invalid_tiles: list[Pos] = []
+placement_map_dirty = True
+
+
+def pathing_resize() -> None:
+    """
+    Resizes every grid to c.GRID_WIDTH_TILES by c.GRID_HEIGHT_TILES and moves
+    start and end to match. Everything is cleared like pathing_reset
+    """
+    global PATH_START_POS, PATH_END_POS, PATH_START_TILE, PATH_END_TILE
 
-# 2D array for where towers have been placed
-collision_grid: list[list[bool]] = [
-    [False] * c.GRID_WIDTH_TILES for _ in range(c.GRID_HEIGHT_TILES)
-]
+    PATH_START_POS = (-outside, c.GRID_HEIGHT / 2)
+    PATH_END_POS = (c.GRID_WIDTH + outside, PATH_START_POS[1])
+    PATH_START_TILE = (0, c.GRID_HEIGHT_TILES // 2)
+    PATH_END_TILE = (c.GRID_WIDTH_TILES - 1, PATH_START_TILE[1])
+
+    cells = c.GRID_WIDTH_TILES * c.GRID_HEIGHT_TILES
+    cell_neighbours[:] = _neighbours_build()
+    for f in (flowfield, placement_flowfield):
+        f.directions[:] = array("b", (-1,)) * cells
+        f.distances[:] = array("i", (-1,)) * cells
+    collision_grid[:] = bytes(cells)
+    placement_map[:] = b"\x01" * cells
+
+    pathing_reset()
 
 
 def pathing_reset() -> None:
-    global flowfield, placement_flowfield, collision_grid
+    global placement_map_dirty
+
+    for f in (flowfield, placement_flowfield):
+        _fill(f.directions, -1)
+        _fill(f.distances, -1)
+        del f.order[:]
+        f.level_starts.clear()
+
+    collision_grid[:] = bytes(len(collision_grid))
+    placement_map_dirty = True
+
+
+pathing_resize()
 
-    for y in range(c.GRID_HEIGHT_TILES):
-        for x in range(c.GRID_WIDTH_TILES):
-            flowfield[y][x] = -1
-            placement_flowfield[y][x] = -1
-            collision_grid[y][x] = False
+
+def collision_set(x: int, y: int, blocked: bool) -> None:
+    """
+    Places or removes a tower in collision_grid. Flowfields still need repairing
+    """
+    global placement_map_dirty
+
+    collision_grid[tile_to_cell(x, y)] = blocked
+    placement_map_dirty = True
 
 
 def flowfield_preview(x: int, y: int) -> bool:
     """
     Returns whether there is a valid path between start and end
+    with a tower at x, y. Result is left in placement_flowfield
     """
-    global collision_grid
+    flowfield_copy(flowfield, placement_flowfield)
 
-    if collision_grid[y][x]:
+    cell = tile_to_cell(x, y)
+    if collision_grid[cell]:
         return True
 
-    collision_grid[y][x] = True
-    valid = flowfield_regenerate(placement_flowfield)
-    collision_grid[y][x] = False
+    collision_grid[cell] = 1
+    valid = flowfield_block(placement_flowfield, x, y)
+    collision_grid[cell] = 0
 
     return valid
 
 
+def placement_map_valid(x: int, y: int) -> bool:
+    """
+    Returns whether there would still be a valid path between start and end
+    with a tower at x, y. Unlike flowfield_preview placement_flowfield is left alone
+    """
+    placement_map_update()
+    return bool(placement_map[tile_to_cell(x, y)])
+
+
+def placement_map_update() -> None:
+    """
+    Rebuilds placement_map if collision_grid changed since the last call.
+    One depth first search from start finds every cell whose tower would cut
+    start off from end (articulation points between the two)
+    """
+    global placement_map_dirty
+
+    if not placement_map_dirty:
+        return
+    placement_map_dirty = False
+
+    cells = len(collision_grid)
+    discovered = array("i", (-1,)) * cells
+    low = array("i", (-1,)) * cells
+    neighbours, collisions = cell_neighbours, collision_grid
+
+    start = tile_to_cell(*PATH_START_TILE)
+    end = tile_to_cell(*PATH_END_TILE)
+    discovered[start] = low[start] = 0
+    time = 1
+    cuts = [start, end]
+
+    # cell and its neighbours left to look at, iterative so big grids can't overflow
+    stack = [(start, iter(neighbours[start]))]
+    while stack:
+        cell, remaining = stack[-1]
+
+        for _, n in remaining:
+            if collisions[n]:
+                continue
+
+            if discovered[n] == -1:
+                discovered[n] = low[n] = time
+                time += 1
+                stack.append((n, iter(neighbours[n])))
+                break
+
+            if discovered[n] < low[cell]:
+                low[cell] = discovered[n]
+
+        # Every neighbour looked at
+        else:
+            stack.pop()
+            if not stack:
+                break
+
+            parent = stack[-1][0]
+            if low[cell] < low[parent]:
+                low[parent] = low[cell]
+
+            # Nothing under cell reaches above the parent, and end was found
+            # under cell. So every path from start to end goes through the parent
+            if low[cell] >= discovered[parent] and discovered[end] >= discovered[cell]:
+                cuts.append(parent)
+
+    # Already cut off, nothing is valid. Towers already there don't change anything
+    if discovered[end] == -1:
+        placement_map[:] = collisions
+        cuts = [cell for cell in range(cells) if not collisions[cell]]
+    else:
+        placement_map[:] = b"\x01" * cells
+
+    placement_invalid_tiles.clear()
+    for cell in cuts:
+        if placement_map[cell]:
+            placement_map[cell] = 0
+            placement_invalid_tiles.append(cell_to_tile(cell))
+
+
 def collision_check(x: int, y: int) -> bool:
     """
     Checks if enemies are on tower or not
     """
     checked = set()
 
-    for i in range(e.active_enemies):
-        enemy = e.enemies[i]
-
+    n = e.active_enemies
+    for cx, cy, ex, ey in zip(e.enemy_cx[:n], e.enemy_cy[:n], e.enemy_x[:n], e.enemy_y[:n]):
         # Skip if already verified this cell
-        if (enemy.cx, enemy.cy) in checked:
+        if (cx, cy) in checked:
             continue
 
-        checked.add((enemy.cx, enemy.cy))
+        checked.add((cx, cy))
 
         # Cannot place on enemy
-        ex = round(enemy.x / c.TILE_SIZE)
-        ey = round(enemy.y / c.TILE_SIZE)
+        ex = round(ex / c.TILE_SIZE)
+        ey = round(ey / c.TILE_SIZE)
 
         if ex == x and ey == y:
             return True
@@ -85,62 +270,121 @@ def collision_check(x: int, y: int) -> bool:
     return False
 
 
-def flowfield_regenerate(field: list[list[int]]) -> bool:
+def flowfield_regenerate(field: Flowfield) -> bool:
     """
     Returns whether there is a valid path between start and end.
     Flood fill BFS algorithm that starts at end and fills to start
     """
+    _fill(field.directions, -1)
+    _fill(field.distances, -1)
 
-    for y in range(c.GRID_HEIGHT_TILES):
-        for x in range(c.GRID_WIDTH_TILES):
-            field[y][x] = -1
+    end = tile_to_cell(*PATH_END_TILE)
+    field.directions[end] = 1  # 1 is right but anything != 0 is fine
+    field.distances[end] = 0
+    field.order[:] = array("i", (end,))
+    field.level_starts[:] = [0, 1]
 
-    complete = False
+    return _flowfield_flood(field, 0)
 
-    q = deque()
 
-    q.append(PATH_END_TILE)
-    field[PATH_END_TILE[1]][PATH_END_TILE[0]] = 1  # 1 is right but anything != 0 is fine
+def flowfield_block(field: Flowfield, x: int, y: int) -> bool:
+    """
+    Repairs field after a tower was placed at x, y in collision_grid.
+    Same result as flowfield_regenerate, but cells nearer the end than the
+    tower can't have changed so the flood fill resumes just before it.
+    """
+    d = field.distances[tile_to_cell(x, y)]
 
-    while q:
-        for _ in range(len(q)):
-            x, y = q.popleft()
+    # Wasn't reachable so nothing routed through it
+    if d == -1:
+        return _flowfield_complete(field)
 
-            for i, d in enumerate(c.DIRECTIONS):
-                dx, dy = d
-                nx = x + dx
-                ny = y + dy
+    if d == 0:
+        return flowfield_regenerate(field)
 
-                if not inside_grid(nx, ny):
-                    continue
+    return _flowfield_flood(field, d - 1)
 
+
+def flowfield_unblock(field: Flowfield, x: int, y: int) -> bool:
+    """
+    Repairs field after a tower was removed from x, y in collision_grid.
+    Same result as flowfield_regenerate, resuming the flood fill from the
+    nearest reachable neighbour.
+    """
+    d = -1
+    for _, n in cell_neighbours[tile_to_cell(x, y)]:
+        nd = field.distances[n]
+        if nd != -1 and (d == -1 or nd < d):
+            d = nd
+
+    # Still walled off
+    if d == -1:
+        return _flowfield_complete(field)
+
+    return _flowfield_flood(field, d)
+
+
+def _flowfield_flood(field: Flowfield, level: int) -> bool:
+    """
+    Throws away every cell farther than level, then fills outwards from the
+    cells at level in the order they were originally reached. Keeping that
+    order means ties between equal length paths break the same way.
+    """
+    directions, distances, order, level_starts = (
+        field.directions,
+        field.distances,
+        field.order,
+        field.level_starts,
+    )
+    neighbours, collisions = cell_neighbours, collision_grid
+
+    keep = level_starts[level + 1]
+    for cell in order[keep:]:
+        directions[cell] = -1
+        distances[cell] = -1
+    del order[keep:]
+    del level_starts[level + 1 :]
+
+    start = level_starts[level]
+    while start < len(order):
+        end = len(order)
+        level += 1
+        level_starts.append(end)
+
+        for cell in order[start:end]:
+            for i, n in neighbours[cell]:
                 # Tower placed on this cell
-                if collision_grid[ny][nx]:
+                if collisions[n]:
                     continue
 
                 # Already been visited
-                if field[ny][nx] != -1:
+                if directions[n] != -1:
                     continue
 
-                if (nx, ny) == PATH_START_TILE:
-                    complete = True
-                    # Don't break cause we want to fill everything
+                order.append(n)
+                directions[n] = i
+                distances[n] = level
 
-                q.append((nx, ny))
-                field[ny][nx] = i
+        start = end
 
-    return complete
+    return _flowfield_complete(field)
 
 
-def flowfield_path(fieldsssss: list[list[int]]) -> list[tuple[int, int]]:
+def _flowfield_complete(field: Flowfield) -> bool:
+    return field.distances[tile_to_cell(*PATH_START_TILE)] != -1
+
+
+def flowfield_path(field: Flowfield) -> list[tuple[int, int]]:
+    fieldsssss = field.directions
     pathsss = [PATH_START_TILE]
     x, y = PATH_START_TILE
 
     i = 0
     while (x, y) != PATH_END_TILE:
-        if fieldsssss[y][x] == -1 or i > 999:
+        d = fieldsssss[tile_to_cell(x, y)]
+        if d == -1 or i > len(field.order):
             return []
-        dx, dy = c.DIRECTIONS[fieldsssss[y][x]]
+        dx, dy = c.DIRECTIONS[d]
         x -= dx
         y -= dy
         pathsss.append((x, y))
@@ -149,31 +393,34 @@ def flowfield_path(fieldsssss: list[list[int]]) -> list[tuple[int, int]]:
     return pathsss
 
 
-def flowfield_copy(from_field: list[list[int]], to_field: list[list[int]]) -> None:
-    for y in range(c.GRID_HEIGHT_TILES):
-        for x in range(c.GRID_WIDTH_TILES):
-            to_field[y][x] = from_field[y][x]
+def flowfield_copy(from_field: Flowfield, to_field: Flowfield) -> None:
+    to_field.directions[:] = from_field.directions
+    to_field.distances[:] = from_field.distances
+    to_field.order[:] = from_field.order
+    to_field.level_starts[:] = from_field.level_starts
 
 
 def debug_print() -> None:
+    width = c.GRID_WIDTH_TILES
+
     print("FLOWFIELD", "#" * 100)
-    for row in flowfield:
+    for row in range(0, len(flowfield.directions), width):
         buffer = ""
-        for v in row:
+        for v in flowfield.directions[row : row + width]:
             buffer += f"{v} "
         print(buffer)
 
     print("PLACEMENT FLOWFIELD", "#" * 100)
-    for row in placement_flowfield:
+    for row in range(0, len(placement_flowfield.directions), width):
         buffer = ""
-        for v in row:
+        for v in placement_flowfield.directions[row : row + width]:
             buffer += f"{v} "
         print(buffer)
 
     print("COLLISION_GRID", "#" * 100)
-    for row in collision_grid:
+    for row in range(0, len(collision_grid), width):
         buffer = ""
-        for v in row:
+        for v in collision_grid[row : row + width]:
             buffer += f"{'#' if v else '.'} "
         print(buffer)
 
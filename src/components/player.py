@@ -1,14 +1,12 @@
 from dataclasses import dataclass
 from enum import Enum, IntEnum, auto
-import random
 
-import pygame
-
-from components.motion import Motion
+from components.camera import camera_from_screen
 import core.constants as c
 import core.globals as g
-from components.particles import Particle, particle_spawn
+from components.particles import ParticleEmitter, particle_spawn
 from utilities.math import signed_num
+from utilities.text import text_render
 
 
 class GameMode(Enum):
@@ -34,10 +32,20 @@ class Player:
 
 player: Player | None = None
 
+# Score changes at least this big get a popup. Ones that land within a few
+#  frames of each other are summed into one popup per sign instead.
+SCORE_POPUP_MIN = 50
+SCORE_POPUP_FRAMES = 6
+
+score_popup_gain = 0
+score_popup_loss = 0
+score_popup_timer = 0  # frames until pending popups show, 0 when none are pending
+
 
 def player_reset() -> None:
-    global player
+    global player, score_popup_gain, score_popup_loss, score_popup_timer
     player = Player()
+    score_popup_gain = score_popup_loss = score_popup_timer = 0
 
 
 def money_add(amount: int) -> None:
@@ -45,21 +53,41 @@ def money_add(amount: int) -> None:
 
 
 def score_add(amount: int) -> None:
+    global score_popup_gain, score_popup_loss, score_popup_timer
     player.score = max(player.score + amount, 0)
 
-    if abs(amount) >= 50:
-        text = g.FONT.render(signed_num(amount), False, c.GREEN if amount > 0 else c.RED)
-        particle_spawn(
-            text,
-            Motion(
-                pygame.Vector2(c.GRID_WIDTH // 2 + random.randint(-30, 30), c.GRID_HEIGHT),
-                pygame.Vector2(0, -100),
-                pygame.Vector2(),
-            ),
-            0,
-            0,
-            20
+    if abs(amount) >= SCORE_POPUP_MIN and not c.IS_HEADLESS:
+        if amount > 0:
+            score_popup_gain += amount
+        else:
+            score_popup_loss += amount
+        if score_popup_timer == 0:
+            score_popup_timer = SCORE_POPUP_FRAMES
+
+
+def score_popups_update(flush: bool = False) -> None:
+    """
+    Once per frame, shows pending score popups when their window closes.
+    flush closes the window now, for when there are no more frames to wait for
+    """
+    global score_popup_gain, score_popup_loss, score_popup_timer
+    if score_popup_timer == 0:
+        return
+    score_popup_timer = 0 if flush else score_popup_timer - 1
+    if score_popup_timer > 0:
+        return
+
+    for amount in (score_popup_gain, score_popup_loss):
+        if amount == 0:
+            continue
+        text = text_render(g.FONT, signed_num(amount), c.GREEN if amount > 0 else c.RED)
+        x, y = camera_from_screen(
+            g.camera,
+            c.WINDOW_WIDTH // 2 + g.player_rng.randint(-30, 30),
+            c.WINDOW_HEIGHT - g.camera.offset.y,
         )
+        particle_spawn(text, x, y, 0, -100, 0, 0, 20, emitter=ParticleEmitter.SCORE)
+    score_popup_gain = score_popup_loss = 0
 
 
 player_reset()
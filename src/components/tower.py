@@ -10,12 +10,13 @@ import core.globals as g
 
 import components.enemy as e
 import components.player as p
-from components.animation import Animation, Animator, animator_get_frame, animator_update
+from components.animation import Animation, Animator, animator_update
 from components.camera import camera_to_screen_shake
-from components.particles import ParticleSpriteType, particle_burst
+from components.batch import Layer, batch_add
+from components.particles import ParticleEmitter, ParticleSpriteType, particle_burst
 
 from utilities.math import Pos, point_in_circle
-from utilities.sprite import dim_sprite, gray_sprite
+from utilities.sprite import dim_sprite, gray_sprite, rotate_sprite_cached
 
 
 class TowerType(IntEnum):
@@ -43,7 +44,7 @@ class Tower:
     # for non-cores
     core_tower: Tower | None = None
 
-    target: e.Enemy | None = None
+    target: int | None = None  # enemy slot
     cooldown: int = 0
 
 
@@ -64,8 +65,12 @@ TOWER_ANIMATIONS: list[tuple[Animation, tuple[pygame.Surface, pygame.Surface], p
 
 for tower_type in TowerType:
     start = tower_type.value
-    first_frame = g.TOWERS[start * 7]
     animation = Animation(g.TOWERS[start * 7 : (start + 1) * 7], 0.1)
+    if not animation.frames:
+        # Headless, no sprites to build buttons from
+        TOWER_ANIMATIONS.append((animation, (None, None), None))
+        continue
+    first_frame = animation.frames[0]
     TOWER_ANIMATIONS.append(
         (animation, (dim_sprite(first_frame), first_frame), gray_sprite(first_frame))
     )
@@ -85,6 +90,37 @@ TOWER_PRICES = [
 
 MAX_TOWER_LEVEL = 2
 
+# Shimmer over upgraded towers, the tower blending animators cycle these
+TOWER_BLENDING_FRAMES = g.BLENDING_FX[0:4]
+
+
+def _tower_level_sprite(frame: pygame.Surface, blend: pygame.Surface, level: int) -> pygame.Surface:
+    if level == 0:
+        return frame
+    surf = frame.copy()
+    surf.blit(blend, (0, 0), special_flags=pygame.BLEND_MULT)
+    if level > 1:
+        surf.fill((128, 128, 128), special_flags=pygame.BLEND_ADD)
+    return surf
+
+
+# Every frame with its level shimmer baked in, indexed by
+#  [type][level][frame][blending frame]. The frame after the animation is the disabled image
+TOWER_SPRITES: list[list[list[list[pygame.Surface]]]] = []
+
+for tower_type in TowerType:
+    animation, _, disabled = TOWER_ANIMATIONS[tower_type.value]
+    frames = animation.frames + [disabled] if animation.frames else []
+    TOWER_SPRITES.append(
+        [
+            [
+                [_tower_level_sprite(frame, blend, level) for blend in TOWER_BLENDING_FRAMES]
+                for frame in frames
+            ]
+            for level in range(MAX_TOWER_LEVEL + 1)
+        ]
+    )
+
 TOWER_STATS = [
     # TowerType.CORE
     (
@@ -119,6 +155,11 @@ TOWER_STATS = [
 ]
 
 
+# Splash shots fired this tick: (x, y, radius, damage, slow, target).
+# Resolved together by tower_splash_resolve after every tower has updated.
+splash_shots: list[tuple[float, float, int, float, int, int]] = []
+
+
 def tower_get_power(tower: Tower) -> float:
     if tower.type == TowerType.CORE:
         connected_tower_count = tower.connected_tower_count - (tower.level + 1) * 2
@@ -154,45 +195,35 @@ def tower_update(tower: Tower) -> None:
 
     # Find a target
     if tower.target is None:
-        i = 0
-        while i < e.active_enemies:
-            enemy = e.enemies[i]
-
-            if point_in_circle(enemy.x, enemy.y, tx, ty, stat.radius):
-                tower.target = enemy
-                break
-
-            i += 1
+        tower.target = e.enemy_find_in_radius(tx, ty, stat.radius)
 
     if tower.target is not None:
+        i = e.enemy_index[tower.target]
+        x, y = e.enemy_x[i], e.enemy_y[i]
+
         # Rotate towards target
-        tower.rotation = math.degrees(math.atan2(ty - tower.target.y, tx - tower.target.x)) - 90
+        tower.rotation = math.degrees(math.atan2(ty - y, tx - x)) - 90
 
         # Check if target is dead or out of range
-        if tower.target.health <= 0 or not point_in_circle(
-            tower.target.x, tower.target.y, tx, ty, stat.radius
-        ):
+        if e.enemy_health[i] <= 0 or not point_in_circle(x, y, tx, ty, stat.radius):
             tower.target = None
             return
 
         # Damage target
         if tower.cooldown <= 0:
-            tower.target.health -= stat.damage
-            tower.target.slow_timer += stat.slow
+            e.enemy_health[i] -= stat.damage
+            e.enemy_slow[i] += stat.slow
 
             if stat.splash_radius > 0:
-                # NOTE: omg this is so grosss but we have no time
-                for i in range(e.active_enemies):
-                    ennn = e.enemies[i]
-                    diff_x = ennn.x - tower.target.x
-                    diff_y = ennn.y - tower.target.y
-                    distance = math.sqrt((diff_x**2) + (diff_y**2))
-                    if distance < stat.splash_radius:
-                        ennn.health -= stat.damage / 2  # splash damage halved
-                        ennn.slow_timer += stat.slow
-
-            if tower.target.health <= 0:
-                reward = e.ENEMY_STATS[tower.target.type.value].reward
+                # Target is always inside its own splash, hit it now so the kill counts
+                e.enemy_health[i] -= stat.damage / 2  # splash damage halved
+                e.enemy_slow[i] += stat.slow
+                splash_shots.append(
+                    (x, y, stat.splash_radius, stat.damage / 2, stat.slow, tower.target)
+                )
+
+            if e.enemy_health[i] <= 0:
+                reward = e.ENEMY_STATS[e.enemy_types[i]].reward
                 p.money_add(reward)
                 p.score_add(10 * reward)
             else:
@@ -200,25 +231,40 @@ def tower_update(tower: Tower) -> None:
 
             tower.cooldown = stat.reload_time
 
-            tower_particle_burst(tower.type, tower.level, tower.target.x, tower.target.y)
+            tower_particle_burst(tower.type, tower.level, x, y)
+
+
+def tower_splash_resolve() -> None:
+    """
+    Applies every splash shot fired this tick to the enemies around it.
+    Targets were already hit when the shot was fired.
+    """
+    enemy_x, enemy_y = e.enemy_x, e.enemy_y
+    enemy_health, enemy_slow = e.enemy_health, e.enemy_slow
+    for x, y, radius, damage, slow, target in splash_shots:
+        r2 = radius * radius
+        target = e.enemy_index[target]
+        for bucket in e.enemy_buckets_near(x, y, radius):
+            for i in bucket:
+                if i == target:
+                    continue
+                dx, dy = enemy_x[i] - x, enemy_y[i] - y
+                if dx * dx + dy * dy < r2:
+                    enemy_health[i] -= damage
+                    enemy_slow[i] += slow
+
+    splash_shots.clear()
 
 
 def tower_render(tower: Tower) -> None:
     power = tower_get_power(tower)
 
-    if power == 0:
-        surf = TOWER_ANIMATIONS[tower.type.value][2]
-    else:
-        surf = animator_get_frame(tower.animator)
-    surf = pygame.transform.rotate(surf, -tower.rotation)
-
-    if tower.level > 0:
-        surf = surf.copy()
-        surf.blit(animator_get_frame(tower.blending_anim), (0, 0), special_flags=pygame.BLEND_MULT)
-        if tower.level > 1:
-            surf.fill((128, 128, 128), special_flags=pygame.BLEND_ADD)
+    frames = TOWER_SPRITES[tower.type][tower.level]
+    frame = len(frames) - 1 if power == 0 else tower.animator.frame_index
+    surf = rotate_sprite_cached(frames[frame][tower.blending_anim.frame_index], -tower.rotation)
 
-    g.window.blit(
+    batch_add(
+        Layer.TOWERS,
         surf,
         camera_to_screen_shake(
             g.camera,
@@ -228,22 +274,32 @@ def tower_render(tower: Tower) -> None:
     )
 
     if 0 < power < 1:
-        g.window.blit(
+        batch_add(
+            Layer.TOWERS,
             g.ICONS[2],
             camera_to_screen_shake(
-                g.camera, (tower.tile[0] + 1) * c.TILE_SIZE - 10, tower.tile[1] * c.TILE_SIZE - 3
+                g.camera,
+                (tower.tile[0] + 1) * c.TILE_SIZE - 10,
+                tower.tile[1] * c.TILE_SIZE - 3,
             ),
         )
 
 
+# Scaled radius overlays, only a handful of radii across all types and levels
+_radius_surfaces: dict[int, pygame.Surface] = {}
+
+
 def tower_render_radius(tower: Tower) -> None:
     radius = TOWER_STATS[tower.type.value][tower.level].radius
-    diameter = radius * 2
 
-    surf = pygame.transform.scale(g.RADIUS, (diameter, diameter))
-    surf.set_alpha(50)
+    surf = _radius_surfaces.get(radius)
+    if surf is None:
+        surf = pygame.transform.scale(g.RADIUS, (radius * 2, radius * 2))
+        surf.set_alpha(50)
+        _radius_surfaces[radius] = surf
 
-    g.window.blit(
+    batch_add(
+        Layer.TOWERS,
         surf,
         camera_to_screen_shake(
             g.camera,
@@ -274,6 +330,7 @@ def tower_particle_burst(type: TowerType, level: int, x: int, y: int) -> None:
                 velocity_variance=0,
                 lifespan=10,
                 lifespan_variance=2,
+                emitter=ParticleEmitter.TOWER,
             )
     elif type == TowerType.SLOW:
         for particle_type in (ParticleSpriteType.SLOW_BIG, ParticleSpriteType.SLOW_SMALL):
@@ -286,6 +343,7 @@ def tower_particle_burst(type: TowerType, level: int, x: int, y: int) -> None:
                 velocity_variance=0,
                 lifespan=20,
                 lifespan_variance=5,
+                emitter=ParticleEmitter.TOWER,
             )
     elif type == TowerType.SPLASH:
         for particle_type in (ParticleSpriteType.SPLASH_BIG, ParticleSpriteType.SPLASH_SMALL):
@@ -298,6 +356,7 @@ def tower_particle_burst(type: TowerType, level: int, x: int, y: int) -> None:
                 velocity_variance=0,
                 lifespan=15,
                 lifespan_variance=3,
+                emitter=ParticleEmitter.TOWER,
             )
     elif type == TowerType.ZAP:
         for particle_type in (ParticleSpriteType.ZAP_SMALL, ParticleSpriteType.ZAP_BIG):
@@ -310,4 +369,5 @@ def tower_particle_burst(type: TowerType, level: int, x: int, y: int) -> None:
                 velocity_variance=0,
                 lifespan=8,
                 lifespan_variance=3,
+                emitter=ParticleEmitter.TOWER,
             )
@@ -6,8 +6,10 @@ import core.globals as g
 import core.input as t
 
 from components.audio import AudioChannel, play_sound
+from components.dirty import dirty_mark
 from components.hand import HandType, Tooltip, hand
 from utilities.math import Bbox, Color, Pos
+from utilities.text import text_render
 
 
 @dataclass(slots=True)
@@ -92,21 +94,21 @@ context = ContextUI()
 
 
 def im_text(label: str, justify: float = -1.0, same_line: bool = False) -> None:
-    text = g.FONT.render(label, False, style.text_colour)
+    text = text_render(g.FONT, label, style.text_colour)
     if same_line:
         bbox = (context.x, context.y, *text.get_size())
     else:
         bbox = context.bbox(*text.get_size())
-    g.window.blit(text, (bbox[0] - bbox[2] * (justify / 2 + 0.5), bbox[1] + 7))
+    dirty_mark(g.window.blit(text, (bbox[0] - bbox[2] * (justify / 2 + 0.5), bbox[1] + 7)))
 
 
 def im_button_text(label: str) -> bool:
     bbox = context.bbox(*style.button_dim)
     hovered, clicked, held = context.interact(bbox)
-    g.window.blit(g.BIG_BUTTONS[0][hovered], (bbox[0], bbox[1]))
+    dirty_mark(g.window.blit(g.BIG_BUTTONS[0][hovered], (bbox[0], bbox[1])))
 
-    text = g.FONT.render(label, False, style.text_colour if hovered else style.text_colour_dim)
-    g.window.blit(text, (bbox[0] + bbox[2] // 2 - text.get_width() // 2, bbox[1] + 7))
+    text = text_render(g.FONT, label, style.text_colour if hovered else style.text_colour_dim)
+    dirty_mark(g.window.blit(text, (bbox[0] + bbox[2] // 2 - text.get_width() // 2, bbox[1] + 7)))
 
     if hovered:
         hand.type = HandType.HOVER
@@ -119,7 +121,7 @@ def im_button_image(
 ) -> bool:
     bbox = context.bbox(*sprites[0].get_size())
     hovered, clicked, held = context.interact(bbox)
-    g.window.blit(sprites[hovered], (bbox[0], bbox[1]), (0, 0, *sprites[0].get_size()))
+    dirty_mark(g.window.blit(sprites[hovered], (bbox[0], bbox[1]), (0, 0, *sprites[0].get_size())))
 
     if hovered:
         hand.type = HandType.HOVER
@@ -135,7 +137,11 @@ def im_checkbox(value: list[bool]) -> bool:
     if clicked:
         value[0] = not value[0]
 
-    g.window.blit(g.BUTTONS[7 - value[0]][hovered], (bbox[0], bbox[1]), (0, 0, *style.checkbox_dim))
+    dirty_mark(
+        g.window.blit(
+            g.BUTTONS[7 - value[0]][hovered], (bbox[0], bbox[1]), (0, 0, *style.checkbox_dim)
+        )
+    )
 
     if hovered:
         hand.type = HandType.HOVER
@@ -146,7 +152,7 @@ def im_checkbox(value: list[bool]) -> bool:
 def im_slider(value: list[float], lo: float, hi: float) -> bool:
     bbox = context.bbox(*style.slider_dim)
     hovered, clicked, held = context.interact(bbox)
-    g.window.blit(g.BIG_BUTTONS[1][hovered], (bbox[0], bbox[1] + 6))
+    dirty_mark(g.window.blit(g.BIG_BUTTONS[1][hovered], (bbox[0], bbox[1] + 6)))
 
     if held:
         percent = (g.mouse_pos[0] - bbox[0]) / style.slider_dim[0]
@@ -155,10 +161,10 @@ def im_slider(value: list[float], lo: float, hi: float) -> bool:
         value[0] = min(max(value[0], lo), hi)
 
     w = value[0] / hi * (style.slider_dim[0] - 8) + 4
-    g.window.blit(g.BUTTONS[4][hovered], (bbox[0] - 16 + w, bbox[1] + 6))
+    dirty_mark(g.window.blit(g.BUTTONS[4][hovered], (bbox[0] - 16 + w, bbox[1] + 6)))
 
-    value_text = g.FONT.render(str(int(value[0])), False, style.text_colour)
-    g.window.blit(value_text, (bbox[0], bbox[1] - 1))
+    value_text = text_render(g.FONT, str(int(value[0])), style.text_colour)
+    dirty_mark(g.window.blit(value_text, (bbox[0], bbox[1] - 1)))
 
     if hovered:
         hand.type = HandType.HOVER
@@ -86,12 +86,29 @@ waves: list[list[Wave]] = [
     [Wave(e.EnemyType.GROUND_SUPER_HEAVY, 50, 10)],
 ]
 
+# Thousands of enemies alive at once, for measuring how update and render scale
+stress_waves: list[list[Wave]] = [
+    [Wave(e.EnemyType.GROUND_HEAVY, 5000, 0.2)],
+    [Wave(e.EnemyType.GROUND_SUPER_HEAVY, 5000, 0.2)],
+    [Wave(e.EnemyType.GROUND, 3000, 0.2), Wave(e.EnemyType.FLYING, 3000, 0.2)],
+]
+
+WAVE_PRESETS = {
+    "normal": waves,
+    "stress": stress_waves,
+}
+
 WAVE_COUNT = len(waves)
 wave_data = WaveData()
+active_waves = waves
 
 
-def wave_reset() -> None:
+def wave_reset(preset: str = "normal") -> None:
+    global active_waves
+    active_waves = WAVE_PRESETS[preset]
+
     e.active_enemies = 0
+    e.enemy_buckets_rebuild()
 
     wave_data.number = 0
 
@@ -109,6 +126,7 @@ def wave_update() -> None:
         # If wave has finished spawning and all enemies died, spawn next wave
         if e.active_enemies == 0:
             wave_new()
+            e.enemy_buckets_rebuild()
             return
     else:
         # Continue spawning current wave
@@ -121,21 +139,16 @@ def wave_update() -> None:
                     break
 
             e.enemy_spawn(wave_data.spawn_enemy_type)
-            # decrement the remaining count regardless of whether it succeeded or not
-            # to avoid getting stuck in an infinite loop!
             wave_data.spawn_remaining -= 1
             wave_data.spawn_tick_counter -= wave_data.spawn_tick
 
         wave_data.spawn_tick_counter += 1
 
     # Update all enemies
-    i = 0
-    while i < e.active_enemies:
-        died = e.enemy_update(i)
-        if died:
-            e.enemy_remove(i)
-        else:
-            i += 1
+    e.enemies_update()
+
+    # Towers target off the buckets this tick
+    e.enemy_buckets_rebuild()
 
 
 def wave_new() -> None:
@@ -155,7 +168,7 @@ def wave_new() -> None:
 
 
 def wave_instruction_new() -> None:
-    w = waves[wave_data.number % WAVE_COUNT]
+    w = active_waves[wave_data.number % len(active_waves)]
 
     if wave_data.spawn_instruction_index >= len(w):
         # Signal that spawn wave is done
@@ -1,6 +1,5 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Iterable
 
 import pygame
 
@@ -28,73 +27,178 @@ class Wire:
     core_tower: Tower | None = None
 
 
-def wire_find(
-    wires: Iterable[Wire], tile: Pos, parent: Wire | None = None
-) -> tuple[Wire | None, Wire | None]:
-    for wire in wires:
-        if wire.tile == tile:
-            return (wire, parent)
-        node, node_parent = wire_find(wire.outgoing_sides.values(), tile, wire)
-        if node is not None:
-            return (node, node_parent)
-
-    return (None, None)
-
-
-def wire_render_comp(wire: Wire) -> None:
-    index: int = 0
-    rot: int = 0
-
-    if wire.incoming_side is not None:
-        match len(wire.outgoing_sides):
-            # dead end
-            case 0:
-                index = 1
-                rot = [c.DOWN, c.LEFT, c.UP, c.RIGHT].index(wire.incoming_side)
-
-            # straight or turn
-            case 1:
-                if (wire.incoming_side in c.VERTICAL) == (
-                    list(wire.outgoing_sides)[0] in c.VERTICAL
-                ):
-                    index = 2
-                    rot = 0 if wire.incoming_side in c.VERTICAL else 1
-                else:
-                    index = 3
-                    rot = [
-                        {c.RIGHT, c.DOWN},
-                        {c.LEFT, c.DOWN},
-                        {c.UP, c.LEFT},
-                        {c.UP, c.RIGHT},
-                    ].index({wire.incoming_side, *wire.outgoing_sides})
-
-            # 3-way split
-            case 2:
-                index = 5
-                rot = [
+# Every wire by cell (y * GRID_WIDTH_TILES + x), a tile only ever holds one wire.
+# Masks hold a bit for each side the wire in that cell connects to, in or out.
+WIRE_SIDE_BITS = {c.UP: 1, c.RIGHT: 2, c.DOWN: 4, c.LEFT: 8}
+_SIDE_OFFSETS = dict(zip((c.UP, c.RIGHT, c.DOWN, c.LEFT), c.DIRECTIONS))
+
+wire_grid: list[Wire | None] = []
+wire_masks = bytearray()
+
+# Bumped whenever anything that changes how the wires look does, renderers
+#  caching the wire layer compare against it
+wire_version: int = 0
+
+
+def _wire_sprite_shape(mask: int) -> tuple[int, int]:
+    """
+    Sprite index and quarter turns for a wire connecting the sides in mask, 0 is a core
+    """
+    sides = {side for side, bit in WIRE_SIDE_BITS.items() if mask & bit}
+    match len(sides):
+        # core
+        case 0:
+            return (0, 0)
+
+        # dead end
+        case 1:
+            return (1, [c.DOWN, c.LEFT, c.UP, c.RIGHT].index(*sides))
+
+        # straight or turn
+        case 2:
+            if sides == {c.UP, c.DOWN}:
+                return (2, 0)
+            if sides == {c.LEFT, c.RIGHT}:
+                return (2, 1)
+            return (
+                3,
+                [
+                    {c.RIGHT, c.DOWN},
+                    {c.LEFT, c.DOWN},
+                    {c.UP, c.LEFT},
+                    {c.UP, c.RIGHT},
+                ].index(sides),
+            )
+
+        # 3-way split
+        case 3:
+            return (
+                5,
+                [
                     {c.UP, c.RIGHT, c.DOWN},
                     {c.LEFT, c.RIGHT, c.DOWN},
                     {c.UP, c.LEFT, c.DOWN},
                     {c.UP, c.LEFT, c.RIGHT},
-                ].index({wire.incoming_side, *wire.outgoing_sides})
+                ].index(sides),
+            )
 
-            # 4-way split
-            case 3:
-                index = 4
+        # 4-way split
+        case _:
+            return (4, 0)
 
-    if not wire.is_permanent:
-        index += 6
 
+def _wire_sprite(mask: int, is_permanent: bool, has_tower: bool) -> pygame.Surface:
+    index, rot = _wire_sprite_shape(mask)
+    if not is_permanent:
+        index += 6
     surf = pygame.transform.rotate(g.WIRES[index], rot * -90)
-    if wire.tower is not None:
+    if has_tower:
         surf.set_alpha(128)
-    g.window.blit(
-        surf,
-        camera_to_screen_shake(g.camera, wire.tile[0] * c.TILE_SIZE, wire.tile[1] * c.TILE_SIZE),
+    return surf
+
+
+# Every wire look rendered once, indexed by [mask][is_permanent][has tower].
+# Mask 0 stands in for cores, every other wire connects to at least its parent
+WIRE_SPRITES: list[list[list[pygame.Surface]]] = (
+    [
+        [
+            [_wire_sprite(mask, is_permanent, has_tower) for has_tower in (False, True)]
+            for is_permanent in (False, True)
+        ]
+        for mask in range(16)
+    ]
+    if g.WIRES
+    else []
+)
+
+
+def wire_grid_reset() -> None:
+    """
+    Clears every wire, sized to the current map
+    """
+    global wire_version
+    wire_version += 1
+    cells = c.GRID_WIDTH_TILES * c.GRID_HEIGHT_TILES
+    wire_grid[:] = [None] * cells
+    wire_masks[:] = bytes(cells)
+
+
+def _wire_parent_cell(wire: Wire) -> int:
+    # Wires only ever branch to a neighbour, so the parent is back along incoming_side
+    dx, dy = _SIDE_OFFSETS[wire.incoming_side]
+    return (wire.tile[1] + dy) * c.GRID_WIDTH_TILES + wire.tile[0] + dx
+
+
+def wire_grid_add(wire: Wire) -> None:
+    """
+    Call once wire is linked to its parent
+    """
+    global wire_version
+    wire_version += 1
+    cell = wire.tile[1] * c.GRID_WIDTH_TILES + wire.tile[0]
+    wire_grid[cell] = wire
+    mask = 0
+    for side in wire.outgoing_sides:
+        mask |= WIRE_SIDE_BITS[side]
+    if wire.incoming_side is not None:
+        mask |= WIRE_SIDE_BITS[wire.incoming_side]
+        wire_masks[_wire_parent_cell(wire)] |= WIRE_SIDE_BITS[
+            c.INVERTED_DIRECTIONS[wire.incoming_side]
+        ]
+    wire_masks[cell] = mask
+
+
+def wire_grid_remove(wire: Wire) -> None:
+    global wire_version
+    wire_version += 1
+    cell = wire.tile[1] * c.GRID_WIDTH_TILES + wire.tile[0]
+    wire_grid[cell] = None
+    wire_masks[cell] = 0
+    if wire.incoming_side is not None:
+        wire_masks[_wire_parent_cell(wire)] &= ~WIRE_SIDE_BITS[
+            c.INVERTED_DIRECTIONS[wire.incoming_side]
+        ]
+
+
+def wire_set_tower(wire: Wire, tower: Tower | None) -> None:
+    global wire_version
+    wire_version += 1
+    wire.tower = tower
+
+
+def wire_find(tile: Pos | None) -> tuple[Wire | None, Wire | None]:
+    """
+    Wire on tile and the wire it branches from, no parent for wires out of cores
+    """
+    if tile is None:
+        return (None, None)
+    x, y = tile
+    if not (0 <= x < c.GRID_WIDTH_TILES and 0 <= y < c.GRID_HEIGHT_TILES):
+        return (None, None)
+
+    wire = wire_grid[y * c.GRID_WIDTH_TILES + x]
+    if wire is None or wire.incoming_side is None:
+        return (wire, None)
+    return (wire, wire_grid[_wire_parent_cell(wire)])
+
+
+def wire_render_tiles(surface: pygame.Surface, columns: range, rows: range) -> None:
+    """
+    Draws every wire in the given tiles straight onto surface, in screen space
+    """
+    sprites = WIRE_SPRITES
+    width = c.GRID_WIDTH_TILES
+    surface.fblits(
+        [
+            (
+                # Cores always get the socket, whatever leaves them
+                sprites[0 if wire.incoming_side is None else wire_masks[cell]][
+                    wire.is_permanent
+                ][wire.tower is not None],
+                camera_to_screen_shake(g.camera, x * c.TILE_SIZE, y * c.TILE_SIZE),
+            )
+            for y in rows
+            for x in columns
+            if (wire := wire_grid[cell := y * width + x]) is not None
+        ]
     )
-
-
-def wire_render_chain(wire: Wire) -> None:
-    wire_render_comp(wire)
-    for node in wire.outgoing_sides.values():
-        wire_render_chain(node)
@@ -1,3 +1,4 @@
+import os
 import sys
 import pygame
 
@@ -20,6 +21,9 @@ FPS = 30  # 0 = Uncapped -> let VSYNC decide best tick speed if enabled
 
 IS_WEB = sys.platform == "emscripten"
 
+# Run the simulation only, without a window, fonts, sprites or audio
+IS_HEADLESS = os.environ.get("HEADLESS", "0") != "0"
+
 # Colour constants
 WHITE = pygame.Color(255, 255, 255)
 BLACK = pygame.Color(0, 0, 0)
@@ -43,5 +47,6 @@ DIRECTIONS = ((0, -1), (1, 0), (0, 1), (-1, 0))
 
 # Size constants
 TILE_SIZE = 32
+# Default map, core.setup.setup_grid changes these for bigger maps
 GRID_WIDTH_TILES, GRID_HEIGHT_TILES = 16, 9
 GRID_WIDTH, GRID_HEIGHT = GRID_WIDTH_TILES * TILE_SIZE, GRID_HEIGHT_TILES * TILE_SIZE
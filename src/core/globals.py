@@ -1,5 +1,6 @@
 import copy
 import platform
+import random
 import pygame
 
 from components.camera import Camera
@@ -17,10 +18,11 @@ def _setup_window() -> pygame.Surface:
         return pygame.display.set_mode(**c.WINDOW_SETUP)
 
 
-pygame.init()
+if not c.IS_HEADLESS:
+    pygame.init()
 
 # Pygame Globals
-window = _setup_window()
+window = _setup_window() if not c.IS_HEADLESS else None
 clock = pygame.time.Clock()
 
 scene_manager = StateMachine()
@@ -35,6 +37,12 @@ last_action_pressed = None
 
 camera: Camera | None = None
 
+# Random per subsystem, seeded together (see core.replay) so runs can be reproduced
+particles_rng = random.Random()
+camera_rng = random.Random()
+player_rng = random.Random()
+menu_rng = random.Random()
+
 # User settings
 default_setting_params = {
     "music": [50],
@@ -47,63 +55,80 @@ setting_params = copy.deepcopy(default_setting_params)
 # Dev settings
 pass
 
-# Load fonts (ttf for web compatibility)
-path = "data/fonts/"
-FONT = pygame.font.Font(path + "Better VCR 9.0.1.ttf", 16)
-FONT_LARGE = pygame.font.Font(path + "Better VCR 9.0.1.ttf", 32)
-DEBUG_FONT = pygame.font.SysFont("monospace", 8)
-
-# Load sprites (png, webp or jpg for web compatibility)
-path = "data/textures/"
-PATTERNS = load_image(path + "patterns.png").convert_alpha()
-
-# I made a new folder for custom textures so we can keep track
-# of what was downloaded from Kenney directly and what was compiled
-# into new spritesheets. I also put the Aseprite source files there.
-path = "data/textures-src/"
-ICON = pygame.image.load(path + "favicon.png").convert_alpha()
-TERRAIN = load_spritesheet(path + "terrain.png", 16, 16)
-HANDS = load_spritesheet(path + "hands.png", 16, 16, double_size=False)
-ICONS = load_spritesheet(path + "icons.png", 16, 16, double_size=False)
-TOWERS = load_spritesheet(path + "towers.png", 16, 16)
-WIRES = load_spritesheet(path + "wires.png", 16, 16)
-ENEMIES = load_spritesheet(path + "enemies.png", 16, 16)
-BLENDING_FX = load_spritesheet(path + "blending-fx.png", 16, 16)
-PARTICLES = load_spritesheet(path + "particles.png", 8, 8)
-BUTTONS: list[pygame.Surface] = []
-for surf in load_spritesheet(path + "buttons.png", 16, 16):
-    BUTTONS.append((dim_sprite(surf), surf))
-BUTTONS_INV: list[pygame.Surface] = []
-for dim, surf in BUTTONS:
-    inv = invert_sprite(surf)
-    BUTTONS_INV.append((dim_sprite(inv), inv))
-BIG_BUTTONS: list[pygame.Surface] = []
-for surf in load_spritesheet(path + "big-buttons.png", 128, 32, double_size=False):
-    BIG_BUTTONS.append((dim_sprite(surf), surf))
-RADIUS = pygame.image.load(path + "radius.png").convert_alpha()
-PATH = pygame.image.load(path + "path.png").convert_alpha()
-LOGO = pygame.image.load(path + "logo.png").convert_alpha()
-LOGO = pygame.transform.scale_by(LOGO, 2)
-
-# Load audio (ogg for web compatibility)
-path = "data/sfx/"
-UI_SFX = [
-    pygame.mixer.Sound(path + "ui_hover.ogg"),
-    pygame.mixer.Sound(path + "ui_select.ogg"),
-]
-TOWER_SFX = [pygame.mixer.Sound(path + f"tower{i}.ogg") for i in range(4)]
-BUILD_SFX = [
-    pygame.mixer.Sound(path + "create_wire.ogg"),
-    pygame.mixer.Sound(path + "destroy_wire.ogg"),
-    pygame.mixer.Sound(path + "create_tower.ogg"),
-    pygame.mixer.Sound(path + "destroy_tower.ogg"),
-    pygame.mixer.Sound(path + "create_core.ogg"),
-]
-PLAYER_SFX = [
-    pygame.mixer.Sound(path + "player_hurt.ogg"),
-    pygame.mixer.Sound(path + "player_game_over.ogg"),
-    pygame.mixer.Sound(path + "player_completed_wave.ogg"),
-]
-
-path = "data/music/"
-GAME_MUSIC = pygame.mixer.Sound(path + "The Spirit of the Forest OGG.ogg")
+if c.IS_HEADLESS:
+    # Nothing is drawn or played headless, so skip loading every asset.
+    # Sheets are left empty so module level animation tables still build,
+    # sound lists keep their length so indexing them stays valid.
+    FONT = FONT_LARGE = DEBUG_FONT = None
+    PATTERNS = ICON = RADIUS = PATH = LOGO = INVALID_TILE = None
+    TERRAIN = HANDS = ICONS = TOWERS = WIRES = ENEMIES = BLENDING_FX = PARTICLES = []
+    BUTTONS = BUTTONS_INV = BIG_BUTTONS = []
+    UI_SFX = [None] * 2
+    TOWER_SFX = [None] * 4
+    BUILD_SFX = [None] * 5
+    PLAYER_SFX = [None] * 3
+    GAME_MUSIC = None
+else:
+    # Load fonts (ttf for web compatibility)
+    path = "data/fonts/"
+    FONT = pygame.font.Font(path + "Better VCR 9.0.1.ttf", 16)
+    FONT_LARGE = pygame.font.Font(path + "Better VCR 9.0.1.ttf", 32)
+    DEBUG_FONT = pygame.font.SysFont("monospace", 8)
+
+    # Load sprites (png, webp or jpg for web compatibility)
+    path = "data/textures/"
+    PATTERNS = load_image(path + "patterns.png").convert_alpha()
+
+    # I made a new folder for custom textures so we can keep track
+    # of what was downloaded from Kenney directly and what was compiled
+    # into new spritesheets. I also put the Aseprite source files there.
+    path = "data/textures-src/"
+    ICON = pygame.image.load(path + "favicon.png").convert_alpha()
+    TERRAIN = load_spritesheet(path + "terrain.png", 16, 16)
+    HANDS = load_spritesheet(path + "hands.png", 16, 16, double_size=False)
+    ICONS = load_spritesheet(path + "icons.png", 16, 16, double_size=False)
+    TOWERS = load_spritesheet(path + "towers.png", 16, 16)
+    WIRES = load_spritesheet(path + "wires.png", 16, 16)
+    ENEMIES = load_spritesheet(path + "enemies.png", 16, 16)
+    BLENDING_FX = load_spritesheet(path + "blending-fx.png", 16, 16)
+    PARTICLES = load_spritesheet(path + "particles.png", 8, 8)
+    BUTTONS: list[pygame.Surface] = []
+    for surf in load_spritesheet(path + "buttons.png", 16, 16):
+        BUTTONS.append((dim_sprite(surf), surf))
+    BUTTONS_INV: list[pygame.Surface] = []
+    for dim, surf in BUTTONS:
+        inv = invert_sprite(surf)
+        BUTTONS_INV.append((dim_sprite(inv), inv))
+    BIG_BUTTONS: list[pygame.Surface] = []
+    for surf in load_spritesheet(path + "big-buttons.png", 128, 32, double_size=False):
+        BIG_BUTTONS.append((dim_sprite(surf), surf))
+    RADIUS = pygame.image.load(path + "radius.png").convert_alpha()
+    PATH = pygame.image.load(path + "path.png").convert_alpha()
+    LOGO = pygame.image.load(path + "logo.png").convert_alpha()
+    LOGO = pygame.transform.scale_by(LOGO, 2)
+    # Shades cells that would block the path while dragging a tower
+    INVALID_TILE = pygame.Surface((c.TILE_SIZE, c.TILE_SIZE), pygame.SRCALPHA)
+    INVALID_TILE.fill((*c.RED[:3], 64))
+
+    # Load audio (ogg for web compatibility)
+    path = "data/sfx/"
+    UI_SFX = [
+        pygame.mixer.Sound(path + "ui_hover.ogg"),
+        pygame.mixer.Sound(path + "ui_select.ogg"),
+    ]
+    TOWER_SFX = [pygame.mixer.Sound(path + f"tower{i}.ogg") for i in range(4)]
+    BUILD_SFX = [
+        pygame.mixer.Sound(path + "create_wire.ogg"),
+        pygame.mixer.Sound(path + "destroy_wire.ogg"),
+        pygame.mixer.Sound(path + "create_tower.ogg"),
+        pygame.mixer.Sound(path + "destroy_tower.ogg"),
+        pygame.mixer.Sound(path + "create_core.ogg"),
+    ]
+    PLAYER_SFX = [
+        pygame.mixer.Sound(path + "player_hurt.ogg"),
+        pygame.mixer.Sound(path + "player_game_over.ogg"),
+        pygame.mixer.Sound(path + "player_completed_wave.ogg"),
+    ]
+
+    path = "data/music/"
+    GAME_MUSIC = pygame.mixer.Sound(path + "The Spirit of the Forest OGG.ogg")
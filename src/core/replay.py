@@ -0,0 +1,122 @@
+"""
+Seeded runs with a per tick input log that can be replayed against
+statemachine_execute to reproduce a run exactly. The header also holds the
+grid size the run was played on.
+
+Each tick is packed into 8 bytes: mouse x, mouse y and one int holding
+2 bits per mouse button followed by 2 bits per action.
+"""
+
+from dataclasses import dataclass, field
+import random
+import struct
+
+import core.constants as c
+import core.globals as g
+import core.input as t
+
+
+REPLAY_MAGIC = b"PDRP"
+REPLAY_VERSION = 2
+
+REPLAY_HEADER = struct.Struct("<4sHq")  # magic, version, seed
+REPLAY_GRID = struct.Struct("<HH")  # grid width, grid height, since version 2
+REPLAY_TICK = struct.Struct("<hhI")  # mouse x, mouse y, packed buffers
+
+
+@dataclass(slots=True)
+class Replay:
+    seed: int = 0
+    ticks: bytearray = field(default_factory=bytearray)
+    # Version 1 replays were all played on the default grid
+    grid_width: int = c.GRID_WIDTH_TILES
+    grid_height: int = c.GRID_HEIGHT_TILES
+
+
+def parse_seed(text: str) -> int:
+    """
+    Reads a seed that fits in a replay header
+    """
+    seed = int(text)
+    if not -(2**63) <= seed < 2**63:
+        raise ValueError(f"seed {text} does not fit in 64 bits")
+    return seed
+
+
+def rng_seed(seed: int) -> None:
+    """
+    Seeds every subsystem random, each with its own stream
+    """
+    rngs = (g.particles_rng, g.camera_rng, g.player_rng, g.menu_rng)
+    for i, rng in enumerate(rngs):
+        rng.seed(seed * len(rngs) + i)
+
+
+def replay_new(seed: int | None = None) -> Replay:
+    """
+    Starts a new recording and seeds the game with it
+    """
+    if seed is None:
+        seed = random.getrandbits(32)
+    rng_seed(seed)
+    return Replay(seed)
+
+
+def replay_tick_count(replay: Replay) -> int:
+    return len(replay.ticks) // REPLAY_TICK.size
+
+
+def replay_record(replay: Replay) -> None:
+    """
+    Appends this tick's input. Call after input buffers have been updated
+    """
+    buffers = 0
+    shift = 0
+    for state in g.mouse_buffer:
+        buffers |= state << shift
+        shift += 2
+    for state in g.action_buffer:
+        buffers |= state << shift
+        shift += 2
+
+    replay.ticks += REPLAY_TICK.pack(g.mouse_pos[0], g.mouse_pos[1], buffers)
+
+
+def replay_apply(replay: Replay, tick: int) -> None:
+    """
+    Overwrites mouse position and input buffers with the recorded tick
+    """
+    x, y, buffers = REPLAY_TICK.unpack_from(replay.ticks, tick * REPLAY_TICK.size)
+
+    g.last_mouse_pos = g.mouse_pos[:]
+    g.mouse_pos = (x, y)
+
+    for button in t.MouseButton:
+        g.mouse_buffer[button] = t.InputState(buffers & 3)
+        buffers >>= 2
+    for action in t.Action:
+        g.action_buffer[action] = t.InputState(buffers & 3)
+        buffers >>= 2
+
+
+def replay_save(replay: Replay, path: str) -> None:
+    with open(path, "wb") as f:
+        f.write(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, replay.seed))
+        f.write(REPLAY_GRID.pack(replay.grid_width, replay.grid_height))
+        f.write(replay.ticks)
+
+
+def replay_load(path: str) -> Replay:
+    with open(path, "rb") as f:
+        data = f.read()
+
+    magic, version, seed = REPLAY_HEADER.unpack_from(data)
+    if magic != REPLAY_MAGIC or not 1 <= version <= REPLAY_VERSION:
+        raise ValueError(f"{path} is not a version 1 to {REPLAY_VERSION} replay")
+
+    if version == 1:
+        return Replay(seed, bytearray(data[REPLAY_HEADER.size :]))
+
+    width, height = REPLAY_GRID.unpack_from(data, REPLAY_HEADER.size)
+    ticks = bytearray(data[REPLAY_HEADER.size + REPLAY_GRID.size :])
+    return Replay(seed, ticks, width, height)
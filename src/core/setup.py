@@ -7,7 +7,9 @@ import core.globals as g
 from components.statemachine import statemachine_initialise
 from components.settings import load_settings
 from components.motion import Motion
-from components.camera import Camera
+from components.camera import Camera, camera_fit
+import components.enemy as e
+import components.pathing as path
 
 from scenes.manager import SCENE_MAPPING, SceneState
 
@@ -21,14 +23,7 @@ def setup() -> None:
     pygame.mouse.set_visible(False)
     statemachine_initialise(g.scene_manager, SCENE_MAPPING, SceneState.MENU)
 
-    g.camera = Camera(
-        Motion.empty(),
-        pygame.Vector2(
-            c.WINDOW_WIDTH // 2 - c.GRID_WIDTH // 2, c.WINDOW_HEIGHT // 2 - c.GRID_HEIGHT // 2
-        ),
-        pygame.Vector2(),
-        pygame.Vector2(30, 30),
-    )
+    _setup_camera()
 
     # Try load settings from web
     load_settings()
@@ -36,3 +31,47 @@ def setup() -> None:
     # print("Loaded settings")
 
     pygame.mouse.set_visible(False)
+
+
+def setup_headless() -> None:
+    """
+    Minimal setup for driving the simulation without a window or audio.
+    Scenes are not initialised, the caller owns the game loop.
+    """
+    t.input_init()
+    _setup_camera()
+
+
+def parse_grid_size(text: str) -> tuple[int, int]:
+    """
+    Reads a map size written as WIDTHxHEIGHT in tiles, like 256x256
+    """
+    width, _, height = text.lower().partition("x")
+    width, height = int(width), int(height)
+    # Start and end need their own tiles
+    if width < 2 or height < 1:
+        raise ValueError(f"grid {text} is too small")
+    return width, height
+
+
+def setup_grid(width: int, height: int) -> None:
+    """
+    Changes the map size. Only call between games, pathing is cleared
+    """
+    c.GRID_WIDTH_TILES, c.GRID_HEIGHT_TILES = width, height
+    c.GRID_WIDTH, c.GRID_HEIGHT = width * c.TILE_SIZE, height * c.TILE_SIZE
+
+    path.pathing_resize()
+    e.enemy_buckets_resize()
+    if g.camera is not None:
+        camera_fit(g.camera, c.GRID_WIDTH, c.GRID_HEIGHT)
+
+
+def _setup_camera() -> None:
+    g.camera = Camera(
+        Motion.empty(),
+        pygame.Vector2(),
+        pygame.Vector2(),
+        pygame.Vector2(30, 30),
+    )
+    camera_fit(g.camera, c.GRID_WIDTH, c.GRID_HEIGHT)
@@ -1,3 +1,4 @@
+import argparse
 import asyncio
 import pygame
 
@@ -5,14 +6,56 @@ import core.constants as c
 import core.input as t
 import core.globals as g
 
-from core.setup import setup
-
+from core.setup import parse_grid_size, setup, setup_grid
+from core.replay import (
+    replay_apply,
+    replay_load,
+    replay_new,
+    replay_record,
+    replay_save,
+    replay_tick_count,
+    parse_seed,
+    rng_seed,
+)
+
+import components.dirty as dirty
 from components.statemachine import statemachine_execute
 from components.audio import AudioChannel, play_sound, set_music_volume, set_sfx_volume
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=parse_seed, help="seed for all random in the game")
+    parser.add_argument("--record", metavar="PATH", help="save the input log on exit")
+    parser.add_argument("--replay", metavar="PATH", help="replay a saved input log")
+    parser.add_argument(
+        "--grid", type=parse_grid_size, metavar="WIDTHxHEIGHT", help="map size in tiles"
+    )
+    parser.add_argument(
+        "--dirty-rects", action="store_true", help="only update parts of the screen that changed"
+    )
+    # Browser has no command line
+    args = parser.parse_args([] if c.IS_WEB else None)
+    if args.replay is not None and args.grid is not None:
+        parser.error("--grid can't be used with --replay, the replay holds its own grid size")
+    return args
+
+
 async def main() -> None:
+    args = parse_args()
+
+    # Seed before setup, entering the first scene already uses random
+    if args.replay is not None:
+        replay = replay_load(args.replay)
+        rng_seed(replay.seed)
+    else:
+        replay = replay_new(args.seed)
+        if args.grid is not None:
+            replay.grid_width, replay.grid_height = args.grid
+
     setup()
+    setup_grid(replay.grid_width, replay.grid_height)
+    dirty.dirty_enabled = args.dirty_rects
     # print("Starting game loop")
 
     play_sound(AudioChannel.MUSIC, g.GAME_MUSIC, -1)
@@ -21,29 +64,48 @@ async def main() -> None:
     set_music_volume(g.setting_params["music"][0] / 100)
     set_sfx_volume(g.setting_params["sfx"][0] / 100)
 
-    while True:
-        g.clock.tick(c.FPS)
-        # elapsed_time = g.clock.tick(c.FPS)
-        # g.dt = elapsed_time / 1000.0  # Convert to seconds
-        # g.dt = min(g.dt, c.MAX_DT)  # Clamp delta time
-        # dt *= g.time_dilation
+    tick = 0
+
+    try:
+        while True:
+            g.clock.tick(c.FPS)
+            # elapsed_time = g.clock.tick(c.FPS)
+            # g.dt = elapsed_time / 1000.0  # Convert to seconds
+            # g.dt = min(g.dt, c.MAX_DT)  # Clamp delta time
+            # dt *= g.time_dilation
+
+            if args.replay is not None:
+                running = t.input_event_queue()
+
+                if tick >= replay_tick_count(replay):
+                    running = False
+                else:
+                    replay_apply(replay, tick)
+            else:
+                g.last_mouse_pos = g.mouse_pos[:]
+                g.mouse_pos = pygame.mouse.get_pos()
+                t.update_action_buffer()
 
-        g.last_mouse_pos = g.mouse_pos[:]
-        g.mouse_pos = pygame.mouse.get_pos()
-        t.update_action_buffer()
+                running = t.input_event_queue()
 
-        running = t.input_event_queue()
+                t.update_mouse_buffer()
 
-        if not running:
-            terminate()
+            if not running:
+                terminate()
 
-        t.update_mouse_buffer()
+            if args.record is not None:
+                replay_record(replay)
 
-        statemachine_execute(g.scene_manager)
+            statemachine_execute(g.scene_manager)
+            tick += 1
 
-        # Keep these calls together in this order
-        pygame.display.flip()
-        await asyncio.sleep(0)  # Very important, and keep it 0
+            # Keep these calls together in this order
+            dirty.dirty_present()
+            await asyncio.sleep(0)  # Very important, and keep it 0
+    finally:
+        # Quitting from the menu exits without going through terminate
+        if args.record is not None:
+            replay_save(replay, args.record)
 
 
 def terminate() -> None:
@@ -1,5 +1,6 @@
 from enum import IntEnum, auto
 import math
+from typing import Callable
 import pygame
 
 import core.constants as c
@@ -15,15 +16,21 @@ from components.animation import (
 )
 from components.audio import AudioChannel, play_sound
 from components.camera import (
+    camera_fit,
     camera_from_screen,
+    camera_pan,
     camera_to_screen,
     camera_to_screen_shake,
     camera_update,
+    camera_visible_tiles,
 )
+from components.batch import Layer, batch_add, batch_flush
+from components.dirty import dirty_mark, dirty_mark_full
 from components.hand import HandType, Tooltip, hand, hand_render
 from components.hud import hud_render
 from components.settings import settings_menu
 from components.particles import (
+    ParticleEmitter,
     ParticleSpriteType,
     particle_burst,
     particles_render,
@@ -32,13 +39,16 @@ from components.particles import (
 from components.tower import (
     MAX_TOWER_LEVEL,
     TOWER_ANIMATIONS,
+    TOWER_BLENDING_FRAMES,
     TOWER_PRICES,
     TOWER_STATS,
     Tower,
+    TowerStat,
     TowerType,
     tower_get_power,
     tower_render,
     tower_render_radius,
+    tower_splash_resolve,
     tower_update,
 )
 import components.player as p
@@ -46,15 +56,29 @@ from components.statemachine import StateMachine, statemachine_change_state
 from components.wave import wave_update, wave_reset
 import components.pathing as path
 import components.enemy as e
+import components.wire as w
 from components import ui
 from components.wave import wave_data
-from components.wire import Wire, wire_find, wire_render_chain
+from components.wire import (
+    Wire,
+    wire_find,
+    wire_grid_add,
+    wire_grid_remove,
+    wire_grid_reset,
+    wire_render_tiles,
+    wire_set_tower,
+)
 from utilities.math import Pos
+from utilities.text import text_render
 
 from scenes.scene import Scene
 from scenes import manager
 
 
+# Pixels per second arrow keys scroll maps bigger than the screen
+CAMERA_PAN_SPEED = 16 * c.TILE_SIZE
+
+
 class MenuState(IntEnum):
     GAME = 0
     SETTINGS = auto()
@@ -87,6 +111,10 @@ class Game(Scene):
         path.flowfield_regenerate(path.flowfield)
         path.flowfield_regenerate(path.placement_flowfield)
 
+        # start looking at where enemies come in
+        camera_fit(g.camera, c.GRID_WIDTH, c.GRID_HEIGHT)
+        camera_pan(g.camera, 0, path.PATH_START_POS[1] - c.WINDOW_HEIGHT / 2)
+
         # wave
         wave_reset()
 
@@ -105,6 +133,7 @@ class Game(Scene):
             # Wire((random.randint(1, 7), 8), c.DOWN, {}, True),
             # Wire((random.randint(8, 14), 8), c.DOWN, {}, True),
         ]
+        wire_grid_reset()
         self.wire_draw_start: Wire | None = None
 
         # vfx
@@ -119,10 +148,14 @@ class Game(Scene):
         self.tutorial = TutorialState.CORE
         self.wire_count = 0
 
+        dirty_mark_full()
+
     def execute(self) -> None:
         if not self.gameover and p.player.health <= 0:
             self.gameover = True
             play_sound(AudioChannel.PLAYER, g.PLAYER_SFX[1])
+            # Popups stop updating with the game, show the last score change now
+            p.score_popups_update(flush=True)
         if self.gameover and self.gameover_timer > 0:
             p.player.speed = p.SpeedType.NORMAL
             self.gameover_timer -= 1
@@ -141,24 +174,40 @@ class Game(Scene):
         # SETTINGS
         if self.current_state == MenuState.SETTINGS:
             g.window.fill(c.BLACK)
+            dirty_mark_full()
 
             if not settings_menu():
                 self.current_state = MenuState.GAME
                 ui.im_new()
+                # The overlay covered everything, next frame has to flip all of it away
+                game_render_terrain_invalidate()
 
             hand_render()
             return
 
         # UPDATE
+        # pan maps bigger than the screen
+        pan = CAMERA_PAN_SPEED * g.dt
+        camera_pan(
+            g.camera,
+            (game_action_down(t.Action.RIGHT) - game_action_down(t.Action.LEFT)) * pan,
+            (game_action_down(t.Action.DOWN) - game_action_down(t.Action.UP)) * pan,
+        )
+
         # mouse pos in camera space
         last_hand_pos = camera_from_screen(g.camera, *g.last_mouse_pos)
         hand_pos = camera_from_screen(g.camera, *g.mouse_pos)
 
-        # hovered tile pos
+        # hovered tile pos, big maps scroll under the hud so ignore it
         hov_tile = path.coord_to_tile(*hand_pos)
+        if not (
+            2 * c.TILE_SIZE <= g.mouse_pos[0] < c.WINDOW_WIDTH - 2 * c.TILE_SIZE
+            and c.TILE_SIZE <= g.mouse_pos[1] < c.WINDOW_HEIGHT - c.TILE_SIZE
+        ):
+            hov_tile = None
 
         # hovered wire
-        hov_wire, hov_wire_parent = wire_find(self.wires, hov_tile)
+        hov_wire, hov_wire_parent = wire_find(hov_tile)
 
         if not self.gameover:
             # user interaction
@@ -186,35 +235,32 @@ class Game(Scene):
                 game_mode_wire_destroy(self, hov_wire, hov_wire_parent)
 
             # wave, enemy, tower update
-            for _ in range(p.player.speed.value):
-                wave_update()
-                for tower in self.towers:
-                    tower_update(tower)
+            game_simulate(self)
 
             # tower tooltips
             game_mode_tower_create(self, hov_tile, hov_wire)
 
             # misc
+            p.score_popups_update()
             particles_update()
             animator_update(self.blending_anim, g.dt)
 
         # RENDER
         g.window.fill(c.BLACK)
 
-        # background grid
-        for x in range(c.GRID_WIDTH_TILES):
-            for y in range(c.GRID_HEIGHT_TILES):
-                g.window.blit(
-                    g.TERRAIN[
-                        8 if (x, y) in (path.PATH_START_TILE, path.PATH_END_TILE) else (x + y) % 2
-                    ],
+        # background grid and wires
+        game_render_terrain()
+
+        # cells that would block the path
+        if self.dragging_tower_type is not None:
+            path.placement_map_update()
+            for x, y in path.placement_invalid_tiles:
+                batch_add(
+                    Layer.INVALID,
+                    g.INVALID_TILE,
                     camera_to_screen_shake(g.camera, x * c.TILE_SIZE, y * c.TILE_SIZE),
                 )
 
-        # wires
-        for wire in self.wires:
-            wire_render_chain(wire)
-
         # towers
         power_count = 0
         for tower in self.towers:
@@ -243,15 +289,20 @@ class Game(Scene):
         for i in range(e.active_enemies):
             e.enemy_render(i)
 
+        # everything queued so far goes under the particles
+        batch_flush()
+
         # particles
         particles_render()
 
         if self.tutorial == TutorialState.COMPLETE:
             for x, y in self.preview_path:
-                g.window.blit(
+                batch_add(
+                    Layer.PATH,
                     g.PATH,
                     camera_to_screen_shake(g.camera, x * c.TILE_SIZE, y * c.TILE_SIZE),
                 )
+            batch_flush()
 
         # hud
         if hov_tile is None:
@@ -264,28 +315,30 @@ class Game(Scene):
             ui.im_reset_position(c.TILE_SIZE, 0)
             if self.tutorial >= TutorialState.UNPAUSE:
                 if last_speed == p.SpeedType.PAUSED:
-                    if ui.im_button_image(g.BUTTONS_INV[9], Tooltip("Paused")):
+                    if ui.im_button_image(g.BUTTONS_INV[9], game_tooltip(Tooltip, "Paused")):
                         p.player.speed = p.SpeedType.NORMAL
                         if self.tutorial == TutorialState.UNPAUSE:
                             self.tutorial = TutorialState.COMPLETE
                 else:
-                    if ui.im_button_image(g.BUTTONS[9], Tooltip("Pause")):
+                    if ui.im_button_image(g.BUTTONS[9], game_tooltip(Tooltip, "Pause")):
                         p.player.speed = p.SpeedType.PAUSED
 
                 if self.tutorial == TutorialState.COMPLETE:
                     ui.im_same_line()
                     if last_speed == p.SpeedType.FAST:
-                        if ui.im_button_image(g.BUTTONS_INV[12], Tooltip("Fast forwarding")):
+                        if ui.im_button_image(
+                            g.BUTTONS_INV[12], game_tooltip(Tooltip, "Fast forwarding")
+                        ):
                             p.player.speed = p.SpeedType.NORMAL
                     else:
-                        if ui.im_button_image(g.BUTTONS[12], Tooltip("Fast forward")):
+                        if ui.im_button_image(g.BUTTONS[12], game_tooltip(Tooltip, "Fast forward")):
                             p.player.speed = p.SpeedType.FAST
 
             if self.tutorial >= TutorialState.VIEW:
                 ui.im_set_next_position(c.WINDOW_WIDTH - 3 * c.TILE_SIZE, 0)
                 if ui.im_button_image(
                     (g.BUTTONS_INV if last_mode == p.GameMode.WIRING else g.BUTTONS)[1],
-                    Tooltip("Lay wire"),
+                    game_tooltip(Tooltip, "Lay wire"),
                 ):
                     p.player.mode = p.GameMode.WIRING
                     if self.tutorial == TutorialState.VIEW:
@@ -294,70 +347,63 @@ class Game(Scene):
                 ui.im_same_line()
                 if ui.im_button_image(
                     (g.BUTTONS_INV if last_mode == p.GameMode.DESTROY else g.BUTTONS)[2],
-                    Tooltip("Destroy"),
+                    game_tooltip(Tooltip, "Destroy"),
                 ):
                     p.player.mode = p.GameMode.DESTROY
                     if self.tutorial == TutorialState.VIEW:
                         self.tutorial = TutorialState.TOWER
 
             ui.im_set_next_position(c.TILE_SIZE, c.WINDOW_HEIGHT - c.TILE_SIZE)
-            if ui.im_button_image(g.BUTTONS[3], Tooltip("Settings")):
+            if ui.im_button_image(g.BUTTONS[3], game_tooltip(Tooltip, "Settings")):
                 ui.im_new()
                 self.current_state = MenuState.SETTINGS
             if self.tutorial < TutorialState.COMPLETE:
                 ui.im_set_next_position(
                     c.WINDOW_WIDTH - 2 * c.TILE_SIZE, c.WINDOW_HEIGHT - c.TILE_SIZE
                 )
-                if ui.im_button_image(g.BUTTONS[5], Tooltip("Skip tutorial")):
+                if ui.im_button_image(g.BUTTONS[5], game_tooltip(Tooltip, "Skip tutorial")):
                     ui.im_new()
                     self.tutorial = TutorialState.COMPLETE
 
         text_y, icon_y, icon_w = 7, 8, 20
-        wave_text = g.FONT.render(f"WAVE {wave_data.number + 1}", False, c.WHITE)
-        g.window.blit(wave_text, (c.WINDOW_WIDTH // 2 - wave_text.get_width() // 2, text_y))
-        money_text = g.FONT.render(f"${p.player.money}", False, c.WHITE)
-        g.window.blit(
-            g.ICONS[0], (c.WINDOW_WIDTH * 0.3 - (money_text.get_width() + icon_w) // 2, icon_y)
+        wave_text = text_render(g.FONT, f"WAVE {wave_data.number + 1}", c.WHITE)
+        dirty_mark(
+            g.window.blit(wave_text, (c.WINDOW_WIDTH // 2 - wave_text.get_width() // 2, text_y))
         )
-        g.window.blit(
-            money_text,
-            (c.WINDOW_WIDTH * 0.3 - (money_text.get_width() + icon_w) // 2 + icon_w, text_y),
-        )
-        health_text = g.FONT.render(f"{p.player.health}", False, c.WHITE)
-        g.window.blit(
-            g.ICONS[1], (c.WINDOW_WIDTH * 0.7 - (health_text.get_width() + icon_w) // 2, icon_y)
-        )
-        g.window.blit(
-            health_text,
-            (c.WINDOW_WIDTH * 0.7 - (health_text.get_width() + icon_w) // 2 + icon_w, text_y),
-        )
-        score_text = g.FONT.render(f"{p.player.score:>08}", False, c.WHITE)
-        g.window.blit(
-            score_text,
-            (
-                c.WINDOW_WIDTH // 2 - score_text.get_width() // 2,
-                c.WINDOW_HEIGHT - score_text.get_height() - text_y,
-            ),
+        money_text = text_render(g.FONT, f"${p.player.money}", c.WHITE)
+        dirty_mark(
+            g.window.blit(
+                g.ICONS[0], (c.WINDOW_WIDTH * 0.3 - (money_text.get_width() + icon_w) // 2, icon_y)
+            )
         )
-
-        # left and right
-        for y in range(c.GRID_HEIGHT_TILES):
+        dirty_mark(
             g.window.blit(
-                g.TERRAIN[5],
-                camera_to_screen_shake(g.camera, -1 * c.TILE_SIZE, y * c.TILE_SIZE),
+                money_text,
+                (c.WINDOW_WIDTH * 0.3 - (money_text.get_width() + icon_w) // 2 + icon_w, text_y),
             )
+        )
+        health_text = text_render(g.FONT, f"{p.player.health}", c.WHITE)
+        dirty_mark(
             g.window.blit(
-                g.TERRAIN[6],
-                camera_to_screen_shake(g.camera, -2 * c.TILE_SIZE, y * c.TILE_SIZE),
+                g.ICONS[1], (c.WINDOW_WIDTH * 0.7 - (health_text.get_width() + icon_w) // 2, icon_y)
             )
+        )
+        dirty_mark(
             g.window.blit(
-                g.TERRAIN[4],
-                camera_to_screen_shake(g.camera, c.GRID_WIDTH, y * c.TILE_SIZE),
+                health_text,
+                (c.WINDOW_WIDTH * 0.7 - (health_text.get_width() + icon_w) // 2 + icon_w, text_y),
             )
+        )
+        score_text = text_render(g.FONT, f"{p.player.score:>08}", c.WHITE)
+        dirty_mark(
             g.window.blit(
-                g.TERRAIN[6],
-                camera_to_screen_shake(g.camera, c.GRID_WIDTH + c.TILE_SIZE, y * c.TILE_SIZE),
+                score_text,
+                (
+                    c.WINDOW_WIDTH // 2 - score_text.get_width() // 2,
+                    c.WINDOW_HEIGHT - score_text.get_height() - text_y,
+                ),
             )
+        )
 
         if not self.gameover:
             last_dragging_tower_type = self.dragging_tower_type
@@ -379,16 +425,7 @@ class Game(Scene):
                     i * (c.TILE_SIZE + 6) + c.TILE_SIZE + 6 + (30 if i != 0 else 0),
                 )
 
-                tooltip = Tooltip(tower_type.name, [(0, f"${TOWER_PRICES[tower_type.value]}")])
-                if tower_type != TowerType.CORE:
-                    stat = TOWER_STATS[tower_type.value][0]
-                    tooltip.lines.append((3, f"Dmg: {stat.damage}"))
-                    tooltip.lines.append((4, f"Spd: {20 - stat.reload_time}"))
-                    if stat.splash_radius > 0:
-                        tooltip.lines.append((-1, "Deals splash dmg"))
-                    if stat.slow > 0:
-                        tooltip.lines.append((-1, "Slows enemies"))
-
+                tooltip = game_tooltip(_tooltip_shop, tower_type)
                 if ui.im_button_image(TOWER_ANIMATIONS[tower_type.value][1], tooltip):
                     ui.context.held_id = -1
                     if p.player.money >= TOWER_PRICES[tower_type.value]:
@@ -401,6 +438,7 @@ class Game(Scene):
                 preview_tile = TOWER_ANIMATIONS[self.dragging_tower_type.value][1][1]
                 if hov_tile is not None:
                     tower_render_radius(Tower(hov_tile, self.dragging_tower_type, 0))
+                    batch_flush()
 
             elif p.player.mode == p.GameMode.WIRING:
                 if hov_wire is not None:
@@ -408,7 +446,7 @@ class Game(Scene):
 
             if preview_tile is not None:
                 if hov_tile is None:
-                    g.window.blit(preview_tile, g.mouse_pos)
+                    dirty_mark(g.window.blit(preview_tile, g.mouse_pos))
                 else:
                     surf = preview_tile.copy()
                     surf.set_alpha(200)
@@ -417,35 +455,41 @@ class Game(Scene):
                         (0, 0),
                         special_flags=pygame.BLEND_MULT,
                     )
-                    g.window.blit(
-                        surf,
-                        camera_to_screen(
-                            g.camera, hov_tile[0] * c.TILE_SIZE, hov_tile[1] * c.TILE_SIZE
-                        ),
+                    dirty_mark(
+                        g.window.blit(
+                            surf,
+                            camera_to_screen(
+                                g.camera, hov_tile[0] * c.TILE_SIZE, hov_tile[1] * c.TILE_SIZE
+                            ),
+                        )
                     )
 
         # heading
         if self.gameover:
-            heading = g.FONT_LARGE.render("GAME OVER", False, c.WHITE, c.BLACK)
-            g.window.blit(
-                heading,
-                (
-                    c.WINDOW_WIDTH // 2 - heading.get_width() // 2,
-                    c.WINDOW_HEIGHT // 2 - heading.get_height() // 2 - 30,
-                ),
+            heading = text_render(g.FONT_LARGE, "GAME OVER", c.WHITE, c.BLACK)
+            dirty_mark(
+                g.window.blit(
+                    heading,
+                    (
+                        c.WINDOW_WIDTH // 2 - heading.get_width() // 2,
+                        c.WINDOW_HEIGHT // 2 - heading.get_height() // 2 - 30,
+                    ),
+                )
             )
 
             if self.gameover_timer <= 0:
-                continue_text = g.FONT.render(
-                    "<CLICK> anywhere to return to menu", False, c.WHITE, c.BLACK
+                continue_text = text_render(
+                    g.FONT, "<CLICK> anywhere to return to menu", c.WHITE, c.BLACK
                 )
 
-                g.window.blit(
-                    continue_text,
-                    (
-                        c.WINDOW_WIDTH // 2 - continue_text.get_width() // 2,
-                        c.WINDOW_HEIGHT // 2 - continue_text.get_height() // 2 + 20,
-                    ),
+                dirty_mark(
+                    g.window.blit(
+                        continue_text,
+                        (
+                            c.WINDOW_WIDTH // 2 - continue_text.get_width() // 2,
+                            c.WINDOW_HEIGHT // 2 - continue_text.get_height() // 2 + 20,
+                        ),
+                    )
                 )
 
                 if t.mouse_pressed(t.MouseButton.LEFT):
@@ -454,90 +498,104 @@ class Game(Scene):
 
         # tutorial render
         if self.tutorial == TutorialState.CORE:
-            tutorial_text = g.FONT.render(
-                "Spend some money to place a CORE.\nTry dragging one onto the map", False, c.WHITE
+            tutorial_text = text_render(
+                g.FONT, "Spend some money to place a CORE.\nTry dragging one onto the map", c.WHITE
             )
 
-            g.window.blit(
-                tutorial_text,
-                (
-                    c.WINDOW_WIDTH // 2 - tutorial_text.get_width() // 2,
-                    c.WINDOW_HEIGHT // 2 - tutorial_text.get_height() // 2 + 100,
-                ),
+            dirty_mark(
+                g.window.blit(
+                    tutorial_text,
+                    (
+                        c.WINDOW_WIDTH // 2 - tutorial_text.get_width() // 2,
+                        c.WINDOW_HEIGHT // 2 - tutorial_text.get_height() // 2 + 100,
+                    ),
+                )
             )
         elif self.tutorial == TutorialState.WIRES:
-            tutorial_text = g.FONT.render(
+            tutorial_text = text_render(
+                g.FONT,
                 "Click and drag to wire from the CORE.\nYou can also branch wires from each other",
-                False,
                 c.WHITE,
             )
 
-            g.window.blit(
-                tutorial_text,
-                (
-                    c.WINDOW_WIDTH // 2 - tutorial_text.get_width() // 2,
-                    c.WINDOW_HEIGHT // 2 - tutorial_text.get_height() // 2 + 100,
-                ),
+            dirty_mark(
+                g.window.blit(
+                    tutorial_text,
+                    (
+                        c.WINDOW_WIDTH // 2 - tutorial_text.get_width() // 2,
+                        c.WINDOW_HEIGHT // 2 - tutorial_text.get_height() // 2 + 100,
+                    ),
+                )
             )
         elif self.tutorial == TutorialState.TOWER:
-            tutorial_text = g.FONT.render(
-                "Place a tower on the map.\nMake sure to power it using wires", False, c.WHITE
+            tutorial_text = text_render(
+                g.FONT, "Place a tower on the map.\nMake sure to power it using wires", c.WHITE
             )
 
-            g.window.blit(
-                tutorial_text,
-                (
-                    c.WINDOW_WIDTH // 2 - tutorial_text.get_width() // 2,
-                    c.WINDOW_HEIGHT // 2 - tutorial_text.get_height() // 2 + 100,
-                ),
+            dirty_mark(
+                g.window.blit(
+                    tutorial_text,
+                    (
+                        c.WINDOW_WIDTH // 2 - tutorial_text.get_width() // 2,
+                        c.WINDOW_HEIGHT // 2 - tutorial_text.get_height() // 2 + 100,
+                    ),
+                )
             )
         elif self.tutorial == TutorialState.WIRE_MODE:
-            tutorial_text = g.FONT.render("Switch to wire mode to modify wires", False, c.WHITE)
+            tutorial_text = text_render(g.FONT, "Switch to wire mode to modify wires", c.WHITE)
 
-            g.window.blit(
-                tutorial_text,
-                (
-                    c.WINDOW_WIDTH // 2 - tutorial_text.get_width() // 2,
-                    c.WINDOW_HEIGHT // 2 - tutorial_text.get_height() // 2 + 100,
-                ),
+            dirty_mark(
+                g.window.blit(
+                    tutorial_text,
+                    (
+                        c.WINDOW_WIDTH // 2 - tutorial_text.get_width() // 2,
+                        c.WINDOW_HEIGHT // 2 - tutorial_text.get_height() // 2 + 100,
+                    ),
+                )
             )
         elif self.tutorial == TutorialState.VIEW:
-            tutorial_text = g.FONT.render(
+            tutorial_text = text_render(
+                g.FONT,
                 "Change your mode to perform different\nactions such as placing wires,\nviewing stats, or removing builds",
-                False,
                 c.WHITE,
             )
 
-            g.window.blit(
-                tutorial_text,
-                (
-                    c.WINDOW_WIDTH // 2 - tutorial_text.get_width() // 2,
-                    c.WINDOW_HEIGHT // 2 - tutorial_text.get_height() // 2 + 100,
-                ),
+            dirty_mark(
+                g.window.blit(
+                    tutorial_text,
+                    (
+                        c.WINDOW_WIDTH // 2 - tutorial_text.get_width() // 2,
+                        c.WINDOW_HEIGHT // 2 - tutorial_text.get_height() // 2 + 100,
+                    ),
+                )
             )
         elif self.tutorial == TutorialState.ANOTHER_TOWER:
-            tutorial_text = g.FONT.render(
+            tutorial_text = text_render(
+                g.FONT,
                 "Build a defence with towers to stop\nenemies from reaching the right side.\nPlace another powered tower to continue",
-                False,
                 c.WHITE,
             )
 
-            g.window.blit(
-                tutorial_text,
-                (
-                    c.WINDOW_WIDTH // 2 - tutorial_text.get_width() // 2,
-                    c.WINDOW_HEIGHT // 2 - tutorial_text.get_height() // 2 + 100,
-                ),
+            dirty_mark(
+                g.window.blit(
+                    tutorial_text,
+                    (
+                        c.WINDOW_WIDTH // 2 - tutorial_text.get_width() // 2,
+                        c.WINDOW_HEIGHT // 2 - tutorial_text.get_height() // 2 + 100,
+                    ),
+                )
             )
         elif self.tutorial == TutorialState.UNPAUSE:
-            tutorial_text = g.FONT.render("Unpause the game to start. Good luck!", False, c.WHITE)
+            tutorial_text = text_render(g.FONT, "Unpause the game to start. Good luck!", c.WHITE)
 
-            g.window.blit(
-                tutorial_text,
-                (
-                    c.WINDOW_WIDTH // 2 - tutorial_text.get_width() // 2,
-                    c.WINDOW_HEIGHT // 2 - tutorial_text.get_height() // 2 + 100,
-                ),
+            dirty_mark(
+                g.window.blit(
+                    tutorial_text,
+                    (
+                        c.WINDOW_WIDTH // 2 - tutorial_text.get_width() // 2,
+                        c.WINDOW_HEIGHT // 2 - tutorial_text.get_height() // 2 + 100,
+                    ),
+                )
             )
 
         # hand
@@ -547,7 +605,72 @@ class Game(Scene):
         pass
 
 
+# SIMULATION
+def game_simulate(self: Game) -> None:
+    """
+    Fixed update of waves, enemies and towers.
+    Steps once per fixed update of the current speed (none when paused).
+    Does not touch the window so can be driven headless.
+    """
+    for _ in range(p.player.speed.value):
+        wave_update()
+        for tower in self.towers:
+            tower_update(tower)
+        tower_splash_resolve()
+
+
+# RENDER
+# Terrain and wires as last drawn, only redrawn when the camera moves, shakes,
+#  the map changes or the wires do
+terrain_cache: pygame.Surface | None = None
+terrain_cache_key: tuple | None = None
+
+
+def game_render_terrain() -> None:
+    global terrain_cache, terrain_cache_key
+
+    key = (
+        camera_to_screen_shake(g.camera, 0, 0),
+        path.PATH_START_TILE,
+        path.PATH_END_TILE,
+        w.wire_version,
+    )
+    if key != terrain_cache_key:
+        # Whole picture moved
+        dirty_mark_full()
+
+        if terrain_cache is None:
+            terrain_cache = pygame.Surface(c.WINDOW_SIZE).convert()
+        terrain_cache.fill(c.BLACK)
+
+        columns, rows = camera_visible_tiles(g.camera)
+        for x in columns:
+            for y in rows:
+                terrain_cache.blit(
+                    g.TERRAIN[
+                        8 if (x, y) in (path.PATH_START_TILE, path.PATH_END_TILE) else (x + y) % 2
+                    ],
+                    camera_to_screen_shake(g.camera, x * c.TILE_SIZE, y * c.TILE_SIZE),
+                )
+        wire_render_tiles(terrain_cache, columns, rows)
+        terrain_cache_key = key
+
+    g.window.blit(terrain_cache, (0, 0))
+
+
+def game_render_terrain_invalidate() -> None:
+    """
+    Redraws the terrain next frame, which also flips the whole window
+    """
+    global terrain_cache_key
+    terrain_cache_key = None
+
+
 # UTILS (SHOULD MOVE SOMEWHERE ELSE)
+def game_action_down(action: t.Action) -> bool:
+    return t.is_pressed(action) or t.is_held(action)
+
+
 def tile_particle_burst(type: ParticleSpriteType, tile: Pos) -> None:
     particle_burst(
         type,
@@ -558,6 +681,60 @@ def tile_particle_burst(type: ParticleSpriteType, tile: Pos) -> None:
         velocity_variance=20,
         lifespan=10,
         lifespan_variance=2,
+        emitter=ParticleEmitter.TILE,
+    )
+
+
+# TOOLTIPS
+# Tooltips built once per builder and arguments, reusing them also reuses their rendered surface
+_tooltips: dict[tuple, Tooltip] = {}
+
+
+def game_tooltip(build: Callable[..., Tooltip], *args) -> Tooltip:
+    key = (build, *args)
+    tooltip = _tooltips.get(key)
+    if tooltip is None:
+        tooltip = _tooltips[key] = build(*args)
+    return tooltip
+
+
+def _tooltip_stat_lines(stat: TowerStat) -> list[tuple[int, str]]:
+    lines = [(3, f"Dmg: {stat.damage}"), (4, f"Spd: {20 - stat.reload_time}")]
+    if stat.splash_radius > 0:
+        lines.append((-1, "Deals splash dmg"))
+    if stat.slow > 0:
+        lines.append((-1, "Slows enemies"))
+    return lines
+
+
+def _tooltip_shop(tower_type: TowerType) -> Tooltip:
+    tooltip = Tooltip(tower_type.name, [(0, f"${TOWER_PRICES[tower_type.value]}")])
+    if tower_type != TowerType.CORE:
+        tooltip.lines += _tooltip_stat_lines(TOWER_STATS[tower_type.value][0])
+    return tooltip
+
+
+def _tooltip_tower(tower_type: TowerType, level: int, power: int) -> Tooltip:
+    tooltip = Tooltip(f"{tower_type.name} Lv {level + 1}", [(-1, f"Power: {power}%")])
+    if tower_type != TowerType.CORE:
+        tooltip.lines += _tooltip_stat_lines(TOWER_STATS[tower_type.value][level])
+    return tooltip
+
+
+def _tooltip_upgrade(tower_type: TowerType, level: int) -> Tooltip:
+    tooltip = Tooltip(f"Upgrade {tower_type.name}", [(-1, f"Lv {level + 1} -> {level + 2}")])
+    if tower_type != TowerType.CORE:
+        stat_old = TOWER_STATS[tower_type.value][level]
+        stat_new = TOWER_STATS[tower_type.value][level + 1]
+        tooltip.lines.append((3, f"Dmg {stat_old.damage} -> {stat_new.damage}"))
+        tooltip.lines.append((4, f"Spd {20 - stat_old.reload_time} -> {20 -stat_new.reload_time}"))
+    return tooltip
+
+
+def _tooltip_sell(tower_type: TowerType, level: int) -> Tooltip:
+    return Tooltip(
+        f"{tower_type.name} Lv {level + 1}",
+        [(0, f"Sell: +${TOWER_STATS[tower_type.value][level].sell_price}")],
     )
 
 
@@ -565,13 +742,13 @@ def tile_particle_burst(type: ParticleSpriteType, tile: Pos) -> None:
 def game_place_tower_at(self: Game, type: TowerType, tile: Pos) -> Tower:
     tower = Tower(tile[:], type, 0, 0, Animator(), Animator())
     animator_initialise(tower.animator, {0: TOWER_ANIMATIONS[type.value][0]})
-    animator_initialise(tower.blending_anim, {0: Animation(g.BLENDING_FX[0:4], 0.08)})
+    animator_initialise(tower.blending_anim, {0: Animation(TOWER_BLENDING_FRAMES, 0.08)})
     self.towers.append(tower)
 
     if self.tutorial == TutorialState.CORE:
         self.tutorial = TutorialState.WIRES
 
-    path.collision_grid[tower.tile[1]][tower.tile[0]] = True
+    path.collision_set(*tower.tile, True)
     path.flowfield_copy(path.placement_flowfield, path.flowfield)
 
     price = TOWER_PRICES[tower.type.value]
@@ -592,9 +769,11 @@ def game_place_tower_on(self: Game, type: TowerType, parent: Wire):
 def game_delete_tower(self: Game, tower: Tower):
     self.towers.remove(tower)
 
-    path.collision_grid[tower.tile[1]][tower.tile[0]] = False
-    path.flowfield_regenerate(path.flowfield)
+    path.collision_set(*tower.tile, False)
+    path.flowfield_unblock(path.flowfield, *tower.tile)
     self.preview_path = path.flowfield_path(path.flowfield)
+    # Placement preview was made against the old flowfield
+    self.last_flowfield_tile = None
 
     if self.tutorial < TutorialState.COMPLETE:
         sell = TOWER_PRICES[tower.type.value]
@@ -617,6 +796,7 @@ def game_delete_tower_from(self: Game, parent: Wire):
     if parent.incoming_side is None:
         assert parent in self.wires
         self.wires.remove(parent)
+        wire_grid_remove(parent)
         stack = list(parent.outgoing_sides.values())
         while stack:
             wire = stack.pop()
@@ -643,9 +823,13 @@ def game_mode_tower_create(self: Game, tile: Pos | None, hov_wire: Wire | None):
 
         else:
             if tile != self.last_flowfield_tile:
-                path.flowfield_copy(path.flowfield, path.placement_flowfield)
-                self.last_flowfield_collision = path.flowfield_preview(*tile)
-                self.preview_path = path.flowfield_path(path.placement_flowfield)
+                self.last_flowfield_collision = path.placement_map_valid(*tile)
+                # Only valid placements have a path to preview
+                if self.last_flowfield_collision:
+                    path.flowfield_preview(*tile)
+                    self.preview_path = path.flowfield_path(path.placement_flowfield)
+                else:
+                    self.preview_path = []
                 self.last_flowfield_tile = tile[:]
 
             # start or end tile
@@ -659,7 +843,7 @@ def game_mode_tower_create(self: Game, tile: Pos | None, hov_wire: Wire | None):
                 and (hov_wire.tower is None or hov_wire.tower.type != TowerType.CORE)
             ):
                 self.valid_tower_placement = False
-                hand.tooltip = Tooltip("Place cores in empty space")
+                hand.tooltip = game_tooltip(Tooltip, "Place cores in empty space")
 
             # collision with enemy
             elif path.collision_check(*tile):
@@ -677,37 +861,18 @@ def game_mode_tower_create(self: Game, tile: Pos | None, hov_wire: Wire | None):
         if tower.tile != tile:
             continue
 
-        name = f"{tower.type.name} Lv {tower.level + 1}"
-        hand.tooltip = Tooltip(name, [(-1, f"Power: {tower_get_power(tower) * 100:.0f}%")])
-        if tower.type != TowerType.CORE:
-            stat = TOWER_STATS[tower.type.value][tower.level]
-            hand.tooltip.lines.append((3, f"Dmg: {stat.damage}"))
-            hand.tooltip.lines.append((4, f"Spd: {20 - stat.reload_time}"))
-            if stat.splash_radius > 0:
-                hand.tooltip.lines.append((-1, "Deals splash dmg"))
-            if stat.slow > 0:
-                hand.tooltip.lines.append((-1, "Slows enemies"))
+        # Power in whole percent, same as it is shown
+        power = round(tower_get_power(tower) * 100)
+        hand.tooltip = game_tooltip(_tooltip_tower, tower.type, tower.level, power)
 
         if self.dragging_tower_type is not None:
             if self.dragging_tower_type == tower.type:
                 if tower.level < MAX_TOWER_LEVEL:
                     hand.type = HandType.HOVER
-                    hand.tooltip = Tooltip(
-                        f"Upgrade {tower.type.name}",
-                        [(-1, f"Lv {tower.level + 1} -> {tower.level + 2}")],
-                    )
-                    if tower.type != TowerType.CORE:
-                        stat_old = TOWER_STATS[tower.type.value][tower.level]
-                        stat_new = TOWER_STATS[tower.type.value][tower.level + 1]
-                        hand.tooltip.lines.append(
-                            (3, f"Dmg {stat_old.damage} -> {stat_new.damage}")
-                        )
-                        hand.tooltip.lines.append(
-                            (4, f"Spd {20 - stat_old.reload_time} -> {20 -stat_new.reload_time}")
-                        )
+                    hand.tooltip = game_tooltip(_tooltip_upgrade, tower.type, tower.level)
                 else:
                     self.valid_tower_placement = False
-                    hand.tooltip = Tooltip("MAX LEVEL")
+                    hand.tooltip = game_tooltip(Tooltip, "MAX LEVEL")
             else:
                 self.valid_tower_placement = False
 
@@ -715,9 +880,7 @@ def game_mode_tower_create(self: Game, tile: Pos | None, hov_wire: Wire | None):
                 hand.type = HandType.NO
 
         elif p.player.mode == p.GameMode.DESTROY:
-            hand.tooltip = Tooltip(
-                name, [(0, f"Sell: +${TOWER_STATS[tower.type.value][tower.level].sell_price}")]
-            )
+            hand.tooltip = game_tooltip(_tooltip_sell, tower.type, tower.level)
             hand.type = HandType.HOVER
             if t.mouse_pressed():
                 if hov_wire is not None:
@@ -755,7 +918,9 @@ def game_mode_tower_create(self: Game, tile: Pos | None, hov_wire: Wire | None):
             # place core
             else:
                 tower = game_place_tower_at(self, self.dragging_tower_type, tile)
-                self.wires.append(Wire(tile, None, {}, True, tower, tower))
+                wire = Wire(tile, None, {}, True, tower, tower)
+                self.wires.append(wire)
+                wire_grid_add(wire)
                 p.player.mode = p.GameMode.WIRING
         
         # place operation failed
@@ -768,6 +933,7 @@ def game_mode_tower_create(self: Game, tile: Pos | None, hov_wire: Wire | None):
 # WIRES
 def game_place_wire(self: Game, wire: Wire, parent: Wire):
     parent.outgoing_sides[c.INVERTED_DIRECTIONS[wire.incoming_side]] = wire
+    wire_grid_add(wire)
     for tower in self.towers:
         if tower.tile == wire.tile:
             game_attach_tower(self, wire, tower)
@@ -788,6 +954,7 @@ def game_delete_wire(self: Game, wire: Wire, parent: Wire | None):
         parent.outgoing_sides = {
             dir: node for dir, node in parent.outgoing_sides.items() if node != wire
         }
+    wire_grid_remove(wire)
 
     p.money_add(1)
     self.wire_count -= 1
@@ -800,7 +967,7 @@ def game_delete_wire(self: Game, wire: Wire, parent: Wire | None):
 
 
 def game_attach_tower(self: Game, wire: Wire, tower: Tower):
-    wire.tower = tower
+    wire_set_tower(wire, tower)
     if wire.core_tower is not None:
         wire.core_tower.connected_tower_count += 1
         wire.tower.core_tower = wire.core_tower
@@ -811,7 +978,7 @@ def game_detach_tower(self: Game, wire: Wire):
         wire.tower.core_tower = None
     if wire.core_tower is not None:
         wire.core_tower.connected_tower_count -= 1
-    wire.tower = None
+    wire_set_tower(wire, None)
 
 
 def game_mode_wire_create(self: Game, tile: Pos | None, hov_wire: Wire | None):
@@ -837,7 +1004,7 @@ def game_mode_wire_create(self: Game, tile: Pos | None, hov_wire: Wire | None):
         # adjacent tile
         if tile in adjacent_sides:
             # place new wire
-            if (overwrite := wire_find(self.wires, tile)[0]) is None:
+            if (overwrite := wire_find(tile)[0]) is None:
                 if p.player.money >= 1:
                     wire = Wire(tile[:], c.INVERTED_DIRECTIONS[adjacent_sides[tile]], {})
                     wire.core_tower = self.wire_draw_start.core_tower
@@ -845,7 +1012,7 @@ def game_mode_wire_create(self: Game, tile: Pos | None, hov_wire: Wire | None):
                     self.wire_draw_start = wire
                 else:
                     hand.type = HandType.NO
-                    hand.tooltip = Tooltip("Not enough money")
+                    hand.tooltip = game_tooltip(Tooltip, "Not enough money")
 
             # delete previous wire
             elif (
@@ -882,3 +1049,47 @@ def game_mode_wire_destroy(self: Game, hov_wire: Wire | None, hov_wire_parent: W
             stack.extend(wire.outgoing_sides.values())
             game_delete_wire(self, wire, None)
         game_delete_wire(self, hov_wire, hov_wire_parent)
+
+
+# SCRIPTED BUILDS (headless and benchmarks, no mouse involved)
+def game_can_place_tower(tile: Pos) -> bool:
+    """
+    Same validation as dragging a tower onto tile.
+    Also leaves placement_flowfield ready for game_place_tower_at
+    """
+    if not path.inside_grid(*tile):
+        return False
+    if tile in (path.PATH_START_TILE, path.PATH_END_TILE) or path.collision_check(*tile):
+        return False
+    if not path.placement_map_valid(*tile):
+        return False
+    return path.flowfield_preview(*tile)
+
+
+def game_build_core(self: Game, tile: Pos) -> Wire | None:
+    if not game_can_place_tower(tile):
+        return None
+
+    tower = game_place_tower_at(self, TowerType.CORE, tile)
+    wire = Wire(tile, None, {}, True, tower, tower)
+    self.wires.append(wire)
+    wire_grid_add(wire)
+
+    return wire
+
+
+def game_build_tower(self: Game, type: TowerType, parent: Wire, side: str) -> Wire | None:
+    """
+    Lays a wire from parent towards side and places a tower on it
+    """
+    dx, dy = c.DIRECTIONS[(c.UP, c.RIGHT, c.DOWN, c.LEFT).index(side)]
+    tile = (parent.tile[0] + dx, parent.tile[1] + dy)
+    if not game_can_place_tower(tile):
+        return None
+
+    wire = Wire(tile, c.INVERTED_DIRECTIONS[side], {})
+    wire.core_tower = parent.core_tower
+    game_place_wire(self, wire, parent)
+    game_place_tower_on(self, type, wire)
+
+    return wire
@@ -1,6 +1,5 @@
 from enum import IntEnum, auto
 from dataclasses import dataclass
-import random
 import pygame
 
 import core.constants as c
@@ -13,6 +12,7 @@ from components.hand import HandType, hand, hand_render
 from components.hud import hud_render
 import components.ui as ui
 from components.camera import camera_update, camera_to_screen_shake, camera_to_screen
+from components.dirty import dirty_mark_full
 from components.settings import settings_menu
 from components.animation import Animator, animator_get_frame, animator_initialise, animator_update
 from components.tower import TowerType, tower_particle_burst
@@ -53,9 +53,9 @@ class Menu(Scene):
         self.walking: list[EnemyWalker] = []
         for _ in range(20):
             w = EnemyWalker(
-                random.randint(LEFT_BOUND, RIGHT_BOUND),
-                random.randint(TOP_BOUND, BOTTOM_BOUND),
-                random.choice(list(e.EnemyType)),
+                g.menu_rng.randint(LEFT_BOUND, RIGHT_BOUND),
+                g.menu_rng.randint(TOP_BOUND, BOTTOM_BOUND),
+                g.menu_rng.choice(list(e.EnemyType)),
                 Animator(),
             )
             animator_initialise(w.animator, {0: e.ENEMY_ANIMATIONS[w.type.value]})
@@ -73,6 +73,8 @@ class Menu(Scene):
         g.camera.trauma = min(g.camera.trauma, 0.5)
         camera_update(g.camera, g.dt)
 
+        # Walkers cover the whole screen, not worth tracking
+        dirty_mark_full()
         g.window.fill(c.BLACK)
 
         for w in self.walking:
@@ -84,7 +86,7 @@ class Menu(Scene):
 
             if w.x > RIGHT_BOUND or w.x < LEFT_BOUND or w.y > BOTTOM_BOUND or w.y < TOP_BOUND:
                 w.x = LEFT_BOUND
-                w.type = random.choice(list(e.EnemyType))
+                w.type = g.menu_rng.choice(list(e.EnemyType))
                 animator_initialise(w.animator, {0: e.ENEMY_ANIMATIONS[w.type.value]})
                 w.animator.frame_index = 0
                 w.dead = False
@@ -103,7 +105,7 @@ class Menu(Scene):
                     and g.mouse_pos[1] >= y
                     and g.mouse_pos[1] <= y + surf.get_height()
                 ):
-                    tower_type = random.choice(list(TowerType)[1:])
+                    tower_type = g.menu_rng.choice(list(TowerType)[1:])
                     tower_particle_burst(
                         tower_type, 0, w.x + surf.get_width() // 2, w.y + surf.get_height() // 2
                     )
@@ -0,0 +1,49 @@
+import pygame
+
+import core.constants as c
+import core.globals as g
+import core.input as t
+from core.setup import setup
+
+import components.dirty as dirty
+from components.statemachine import statemachine_change_state, statemachine_execute
+from scenes import manager
+import scenes.game as game_scene
+from scenes.game import MenuState
+
+
+def test_leaving_settings_presents_full_window(monkeypatch):
+    setup()
+    monkeypatch.setattr(dirty, "dirty_enabled", True)
+
+    # Area of the window each present pushes to the screen
+    presented = []
+    full = c.WINDOW_WIDTH * c.WINDOW_HEIGHT
+    monkeypatch.setattr(pygame.display, "flip", lambda: presented.append(full))
+    monkeypatch.setattr(
+        pygame.display, "update", lambda rects: presented.append(sum(r.w * r.h for r in rects))
+    )
+
+    def frame():
+        g.camera.trauma = 0
+        t.input_event_queue()
+        statemachine_execute(g.scene_manager)
+        dirty.dirty_present()
+        return presented[-1]
+
+    statemachine_change_state(g.scene_manager, manager.SceneState.GAME)
+    game = g.scene_manager.states[manager.SceneState.GAME]
+    frame()
+    frame()
+
+    game.current_state = MenuState.SETTINGS
+    assert frame() == full
+
+    # Closing the settings menu
+    monkeypatch.setattr(game_scene, "settings_menu", lambda: False)
+    frame()
+    assert game.current_state == MenuState.GAME
+
+    # Nothing else would cover where the overlay was
+    assert frame() == full
+    assert frame() < full
@@ -19,7 +19,8 @@ def lerp(a: int | float, b: int | float, t: int | float) -> int | float:
 
 
 def point_in_circle(x: float, y: float, mx: float, my: float, r: float) -> bool:
-    return (x - mx) ** 2 / (r**2) + (y - my) ** 2 / (r**2) < 1
+    dx, dy = x - mx, y - my
+    return dx * dx + dy * dy < r * r
 
 
 def point_in_ellipse(x: float, y: float, mx: float, my: float, rx: float, ry: float) -> bool:
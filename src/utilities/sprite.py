@@ -1,7 +1,15 @@
+from collections import OrderedDict
+
 import pygame
 
 import core.constants as c
 
+# Angle buckets per full turn, a multiple of 4 so right angles stay exact
+ROTATION_STEPS = 128
+ROTATION_CACHE_SIZE = 2048
+
+_rotation_cache: OrderedDict[tuple[pygame.Surface, int], pygame.Surface] = OrderedDict()
+
 
 def load_image(path: str, *, double_size=True) -> pygame.Surface:
     return pygame.transform.scale_by(pygame.image.load(path), 2 if double_size else 1)
@@ -72,3 +80,21 @@ def rotate_sprite(sprite: pygame.Surface, new_direction: str) -> pygame.Surface:
     if new_direction == c.DOWN:
         return pygame.transform.flip(sprite, False, True)
     assert False
+
+
+def rotate_sprite_cached(sprite: pygame.Surface, angle: float) -> pygame.Surface:
+    """
+    Rotated copy of sprite snapped to the nearest angle bucket, built once
+    and kept until it is the least recently used of ROTATION_CACHE_SIZE
+    """
+    key = (sprite, round(angle * ROTATION_STEPS / 360) % ROTATION_STEPS)
+    surf = _rotation_cache.get(key)
+    if surf is not None:
+        _rotation_cache.move_to_end(key)
+        return surf
+
+    surf = pygame.transform.rotate(sprite, key[1] * 360 / ROTATION_STEPS)
+    _rotation_cache[key] = surf
+    if len(_rotation_cache) > ROTATION_CACHE_SIZE:
+        _rotation_cache.popitem(last=False)
+    return surf
@@ -0,0 +1,27 @@
+from collections import OrderedDict
+
+import pygame
+
+# Rendered strings kept around, HUD numbers and labels repeat almost every frame
+TEXT_CACHE_SIZE = 256
+
+_text_cache: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+
+
+def text_render(font: pygame.font.Font, text: str, colour, background=None) -> pygame.Surface:
+    """
+    Same as font.render without antialiasing, but cached per font, string and colours.
+    The returned surface is shared so must not be modified.
+    """
+    # pygame colours are mutable so can't be hashed
+    key = (font, text, tuple(colour), tuple(background) if background is not None else None)
+    surf = _text_cache.get(key)
+    if surf is not None:
+        _text_cache.move_to_end(key)
+        return surf
+
+    surf = font.render(text, False, colour, background)
+    _text_cache[key] = surf
+    if len(_text_cache) > TEXT_CACHE_SIZE:
+        _text_cache.popitem(last=False)
+    return surf